@@ -0,0 +1,121 @@
+import time
+import asyncio
+import threading
+from urllib.parse import urlparse
+import aiohttp
+from requests.structures import CaseInsensitiveDict
+from auxiliar.cache import CachedResponse
+from auxiliar.metrics import metrics
+
+
+# maximum number of requests in flight for each host (the requests per second are limited by the rate limiters of http_client)
+DEFAULT_HOST_LIMITS = {
+    'dblp.org': {'concurrency': 8},
+    'api.openalex.org': {'concurrency': 100},
+    'api.semanticscholar.org': {'concurrency': 1},
+}
+DEFAULT_LIMITS = {'concurrency': 10}
+DEFAULT_TIMEOUT = 60
+
+
+class AsyncEngine:
+    """HTTP engine based on asyncio and aiohttp. The event loop runs in its own thread and the requests share a pool of connections.
+    Each host has its own limit of requests in flight and uses the rate limiter of the host (shared with the threads),
+    so hundreds of requests can be waiting for OpenAlex while the requests to Semantic Scholar are kept within its quota.
+
+    The crawlers use it through auxiliar.http_client, so the same code can run with threads or with this engine.
+    """
+    def __init__(self, get_limiter, host_limits=None, pool_size=200, target_url=None):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS)
+        if host_limits is not None:
+            self.host_limits.update(host_limits)
+        self.pool_size = pool_size
+        self.get_limiter = get_limiter
+        # function that returns the URL where a request is sent (see http_client.configure_redirects)
+        self.target_url = target_url if target_url is not None else (lambda url: url)
+        self.semaphores = {}
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.session = self._run(self._create_session())
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _create_session(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector, auto_decompress=True)
+
+    def _host_semaphore(self, host):
+        # only called from the event loop, so there is no need for a lock
+        if host not in self.semaphores:
+            limits = self.host_limits.get(host, DEFAULT_LIMITS)
+            self.semaphores[host] = asyncio.Semaphore(limits['concurrency'])
+        return self.semaphores[host]
+
+    async def fetch(self, method, url, params=None, json=None, headers=None, timeout=None):
+        """Makes an HTTP request respecting the limits of the host.
+
+        Args:
+            method (string): HTTP method of the request.
+            url (string): URL of the request.
+            params (dict, optional): query parameters of the request.
+            json (object, optional): JSON body of the request.
+            headers (dict, optional): headers of the request.
+            timeout (float or tuple, optional): timeout of the request in seconds, or a tuple (connect, read) as in requests.
+
+        Returns:
+            CachedResponse: the response (with the same attributes used from a requests.Response).
+        """
+        host = urlparse(url).netloc.lower()
+        semaphore = self._host_semaphore(host)
+        if isinstance(timeout, tuple):
+            client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout if timeout is not None else DEFAULT_TIMEOUT)
+        async with semaphore:
+            wait = self.get_limiter(host).reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            start = time.monotonic()
+            try:
+                async with self.session.request(method, self.target_url(url), params=params, json=json, headers=headers, timeout=client_timeout) as resp:
+                    content = await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                metrics.record_request(host, None, time.monotonic() - start)
+                raise
+            # aiohttp decodes the body while it is read, the bytes received (compressed) are taken from Content-Length
+            num_bytes = int(resp.headers.get('Content-Length') or len(content))
+            metrics.record_request(host, resp.status, time.monotonic() - start, num_bytes)
+            # the headers are looked up without case (e.g. Retry-After), as in a requests.Response
+            return CachedResponse(str(resp.url), resp.status, CaseInsensitiveDict(resp.headers), content, from_cache=False)
+
+    def request(self, method, url, params=None, json=None, headers=None, timeout=None):
+        """Synchronous version of fetch. It can be called from any thread."""
+        return self._run(self.fetch(method, url, params=params, json=json, headers=headers, timeout=timeout))
+
+    def request_many(self, requests_args):
+        """Makes a list of requests concurrently and returns the responses in the same order.
+        The connection errors are returned in place of the response, so http_client can retry them.
+
+        Args:
+            requests_args (list): list of dictionaries with the arguments of fetch (method, url, params, json, headers, timeout).
+
+        Returns:
+            list: the responses of the requests.
+        """
+        async def fetch_safe(args):
+            try:
+                return await self.fetch(**args)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return e
+
+        async def gather():
+            return await asyncio.gather(*(fetch_safe(args) for args in requests_args))
+        return self._run(gather())
+
+    def close(self):
+        self._run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
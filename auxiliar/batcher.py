@@ -0,0 +1,91 @@
+import time
+import threading
+from collections import deque
+
+
+# maximum time (in seconds) that the keys of a thread wait for the keys of other threads to fill a batch
+DEFAULT_MAX_WAIT = 0.1
+
+
+class Batcher:
+    """Packs the keys asked by several threads at the same time into full batches for an API with a batch endpoint
+    (e.g. the 500 IDs of the Semantic Scholar batch endpoint), so the quota of the API is used by full requests.
+
+    The keys wait until there are batch_size keys (from any thread) or until max_wait seconds have passed, then one of the
+    waiting threads sends the batch. A thread that is the only one using the batcher sends its keys at once, as there
+    are no other keys to wait for (e.g. the last unit of work of a crawl). Several batches can be sent at the same time by different threads (the requests
+    per second are limited by the rate limiter of http_client).
+    """
+    def __init__(self, fetch_many, batch_size, max_wait=DEFAULT_MAX_WAIT):
+        """
+        Args:
+            fetch_many (function): function that receives a list of up to batch_size keys and returns a dictionary with the
+                result of each key (the keys without result are not included).
+            batch_size (int): maximum number of keys of each batch.
+            max_wait (float, optional): maximum time in seconds that a key waits for a full batch. Defaults to DEFAULT_MAX_WAIT.
+        """
+        self.fetch_many = fetch_many
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.condition = threading.Condition()
+        self.pending = deque()
+        # number of threads in get_many (waiting for their keys or sending a batch)
+        self.callers = 0
+
+    def get_many(self, keys):
+        """Returns the results of a list of keys, fetched in batches with the keys of the other threads.
+
+        Args:
+            keys (list): the keys.
+
+        Returns:
+            dict: dictionary with the key as key and the result as value (only the keys with result).
+        """
+        request = _Request(dict.fromkeys(keys))
+        if not request.remaining:
+            return {}
+        deadline = time.monotonic() + self.max_wait
+        with self.condition:
+            self.pending.extend((key, request) for key in request.keys)
+            self.callers += 1
+            try:
+                while request.remaining:
+                    if len(self.pending) >= self.batch_size or (self.pending and time.monotonic() >= deadline) \
+                            or (self.pending and self.callers == 1):
+                        self._send_batch()
+                    elif self.pending:
+                        self.condition.wait(max(0, deadline - time.monotonic()))
+                    else:
+                        # the rest of the keys are in a batch sent by another thread
+                        self.condition.wait()
+            except BaseException:
+                # the keys of a failed thread are not sent
+                self.pending = deque(item for item in self.pending if item[1] is not request)
+                raise
+            finally:
+                self.callers -= 1
+        return request.results
+
+    def _send_batch(self):
+        """Sends the oldest pending keys. It is called with the condition held and it releases it during the request."""
+        batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        results = {}
+        self.condition.release()
+        try:
+            results = self.fetch_many(keys)
+        finally:
+            # the keys are answered even if the request fails (without result)
+            self.condition.acquire()
+            for key, request in batch:
+                if key in results:
+                    request.results[key] = results[key]
+                request.remaining -= 1
+            self.condition.notify_all()
+
+
+class _Request:
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.remaining = len(self.keys)
+        self.results = {}
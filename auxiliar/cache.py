@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlparse
+
+
+DEFAULT_CACHE_PATH = './data/cache/http_cache.sqlite'
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3  # 2 GB
+DEFAULT_TTL = 24 * 3600
+# the last access of the cache hits is written to disk in batches of TOUCH_BATCH_SIZE entries or every TOUCH_INTERVAL seconds
+TOUCH_BATCH_SIZE = 1000
+TOUCH_INTERVAL = 60
+
+# time to live (in seconds) of the cached responses for each host
+DEFAULT_TTL_PER_HOST = {
+    'dblp.org': 30 * 24 * 3600,
+    'api.openalex.org': 7 * 24 * 3600,
+    'api.semanticscholar.org': 7 * 24 * 3600,
+}
+
+
+class CachedResponse:
+    """Minimal replacement of a requests.Response object built from a cached entry (or from a response of the async engine).
+    It only exposes the attributes used by the crawlers.
+    """
+    def __init__(self, url, status_code, headers, content, from_cache=True):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def make_key(method, url, params=None, body=None):
+    """Builds the key of a request (content-addressed). The key depends on the method, the URL, the parameters and the body.
+
+    Args:
+        method (string): HTTP method of the request.
+        url (string): URL of the request.
+        params (dict, optional): query parameters of the request.
+        body (object, optional): JSON body of the request.
+
+    Returns:
+        string: SHA-256 hash that identifies the request.
+    """
+    raw = json.dumps([method.upper(), url, params, body], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """HTTP response cache stored on disk using SQLite. The entries expire after the TTL of their host
+    and the least recently used entries are evicted when the cache is bigger than max_size bytes.
+    The last access of the hits is kept in memory and written in batches (see flush), so a hit does not write to disk.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_size=DEFAULT_MAX_SIZE, ttl_per_host=None, offline=False):
+        self.path = path
+        self.max_size = max_size
+        self.ttl_per_host = dict(DEFAULT_TTL_PER_HOST)
+        if ttl_per_host is not None:
+            self.ttl_per_host.update(ttl_per_host)
+        self.offline = offline
+        self.lock = threading.Lock()
+        # last access of the hits not written yet (key as key)
+        self.touched = {}
+        self.last_flush = time.time()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                url TEXT,
+                                status_code INTEGER,
+                                headers TEXT,
+                                content BLOB,
+                                size INTEGER,
+                                created REAL,
+                                last_access REAL)""")
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)')
+        self.conn.commit()
+        self.total_size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _ttl(self, url):
+        host = urlparse(url).netloc.lower()
+        return self.ttl_per_host.get(host, DEFAULT_TTL)
+
+    def get(self, method, url, params=None, body=None, max_age=None):
+        """Returns the cached response of a request or None if it is not cached or it has expired.
+
+        Args:
+            method (string): HTTP method of the request.
+            url (string): URL of the request.
+            params (dict, optional): query parameters of the request.
+            body (object, optional): JSON body of the request.
+            max_age (float, optional): maximum age in seconds of the response, if it is lower than the TTL of the host.
+
+        Returns:
+            CachedResponse: the cached response or None.
+        """
+        key = make_key(method, url, params, body)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute('SELECT url, status_code, headers, content, created FROM responses WHERE key = ?',
+                                    (key,)).fetchone()
+            if row is None:
+                return None
+            cached_url, status_code, headers, content, created = row
+            # expired entries are still served in offline mode
+            ttl = self._ttl(url) if max_age is None else min(max_age, self._ttl(url))
+            if not self.offline and now - created > ttl:
+                return None
+            self.touched[key] = now
+            if len(self.touched) >= TOUCH_BATCH_SIZE or now - self.last_flush >= TOUCH_INTERVAL:
+                self._write_touched()
+                self.conn.commit()
+        return CachedResponse(cached_url, status_code, json.loads(headers), content)
+
+    def put(self, method, url, params, body, response):
+        """Stores a response in the cache and evicts the least recently used entries if the cache is full.
+
+        Args:
+            method (string): HTTP method of the request.
+            url (string): URL of the request.
+            params (dict): query parameters of the request.
+            body (object): JSON body of the request.
+            response (requests.Response): the response to store.
+        """
+        key = make_key(method, url, params, body)
+        content = response.content
+        headers = json.dumps({'Content-Type': response.headers.get('Content-Type', '')})
+        size = len(content)
+        now = time.time()
+        with self.lock:
+            # the pending last accesses are written first, so the eviction uses them
+            self._write_touched()
+            old = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            if old is not None:
+                self.total_size -= old[0]
+            self.conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                              (key, url, response.status_code, headers, content, size, now, now))
+            self.total_size += size
+            if self.total_size > self.max_size:
+                self._evict()
+            self.conn.commit()
+
+    def _write_touched(self):
+        """Writes the last access of the pending hits (without commit). The lock must be held by the caller."""
+        if self.touched:
+            self.conn.executemany('UPDATE responses SET last_access = ? WHERE key = ?',
+                                  [(last_access, key) for key, last_access in self.touched.items()])
+            self.touched = {}
+        self.last_flush = time.time()
+
+    def flush(self):
+        """Writes the last access of the pending hits to disk."""
+        with self.lock:
+            self._write_touched()
+            self.conn.commit()
+
+    def _evict(self):
+        """Deletes the least recently used entries until the size of the cache is below 90% of max_size.
+        The lock must be held by the caller.
+        """
+        target = self.max_size * 0.9
+        cursor = self.conn.execute('SELECT key, size FROM responses ORDER BY last_access ASC')
+        to_delete = []
+        for key, size in cursor:
+            if self.total_size <= target:
+                break
+            to_delete.append((key,))
+            self.total_size -= size
+        self.conn.executemany('DELETE FROM responses WHERE key = ?', to_delete)
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM responses')
+            self.conn.commit()
+            self.touched = {}
+            self.total_size = 0
+
+    def close(self):
+        with self.lock:
+            self._write_touched()
+            self.conn.commit()
+            self.conn.close()
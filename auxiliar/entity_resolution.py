@@ -0,0 +1,182 @@
+import zlib
+import logging
+import numpy as np
+from auxiliar import jsonl, matching, records
+from auxiliar.paper_index import normalize_title
+
+
+# the signature of each title has NUM_BANDS * ROWS_PER_BAND MinHash values. Two titles are candidates if all the values
+# of one band are equal, which happens with high probability when their Jaccard similarity is above
+# (1 / NUM_BANDS) ** (1 / ROWS_PER_BAND), ~0.77 with 8 bands of 8 rows
+NUM_BANDS = 8
+ROWS_PER_BAND = 8
+# the signatures are stored in numpy arrays of SIGNATURE_CHUNK rows while the snapshot is read
+SIGNATURE_CHUNK = 100000
+SHINGLE_SIZE = 3
+# minimum estimated Jaccard similarity of the titles and maximum difference of the years of a match
+MIN_SIMILARITY = 0.8
+MAX_YEAR_DIFFERENCE = 1
+
+_PRIME = (1 << 61) - 1
+_random = np.random.RandomState(1)
+_A = _random.randint(1, 1 << 31, size=NUM_BANDS * ROWS_PER_BAND).astype(np.uint64)
+_B = _random.randint(0, 1 << 31, size=NUM_BANDS * ROWS_PER_BAND).astype(np.uint64)
+
+
+def _year(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def minhash(title):
+    """Returns the MinHash signature of the character shingles of a normalized title, or None if the title is empty."""
+    text = title.replace(' ', '')
+    if not text:
+        return None
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in shingles], dtype=np.uint64)
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def snapshot_record(record):
+    """Converts a record of a Semantic Scholar (papers dataset or API) or OpenAlex (works) snapshot to the fields used by the matcher.
+
+    Args:
+        record (dict): the record of the snapshot.
+
+    Returns:
+        tuple: the Semantic Scholar ID of the paper (for the batch endpoint), its title, year and author names, or None if it has no usable ID.
+    """
+    if 'authorships' in record:
+        # OpenAlex work, it can only be requested to Semantic Scholar by its DOI
+        doi = record.get('doi')
+        if not doi:
+            return None
+        paper_id = f"DOI:{doi.replace('https://doi.org/', '')}"
+        title = record.get('title') or record.get('display_name')
+        year = record.get('publication_year')
+        authors = [(a.get('author') or {}).get('display_name') or '' for a in record['authorships']]
+    else:
+        external_ids = record.get('externalids') or record.get('externalIds') or {}
+        if record.get('paperId'):
+            paper_id = record['paperId']
+        elif record.get('corpusid') is not None:
+            paper_id = f"CorpusId:{record['corpusid']}"
+        elif external_ids.get('DOI'):
+            paper_id = f"DOI:{external_ids['DOI']}"
+        else:
+            return None
+        title = record.get('title')
+        year = record.get('year')
+        authors = [a.get('name') or '' for a in record.get('authors') or []]
+    if not title:
+        return None
+    return paper_id, title, year, authors
+
+
+class TitleMatcher:
+    """Resolves titles to Semantic Scholar IDs using a local snapshot of Semantic Scholar or OpenAlex (a JSON Lines file,
+    plain or compressed), so only the papers that are not found in it are searched with the API.
+
+    The titles of the snapshot are indexed with MinHash LSH. A paper matches a record of the snapshot if their titles are
+    similar, their years are close and at least half of the authors match (see matching.match_authors).
+    The snapshot is read once, as a stream, and only the ID, the year, the normalized author names (interned, so each name
+    is stored once) and the MinHash signature of the records of the years to resolve (first and last year) are kept in
+    memory.
+    """
+    def __init__(self, snapshot_path, years=None):
+        self.snapshot_path = snapshot_path
+        self.years = years
+        self.ids = []
+        self.record_years = []
+        self.record_authors = []
+        self.buckets = {}
+
+        chunks, chunk = [], []
+        for position, (paper_id, year, authors, signature) in enumerate(self._iter_snapshot()):
+            self.ids.append(paper_id)
+            self.record_years.append(year)
+            self.record_authors.append(tuple(records.intern(matching.normalize_name(a)) for a in authors))
+            chunk.append(signature)
+            if len(chunk) == SIGNATURE_CHUNK:
+                chunks.append(np.stack(chunk))
+                chunk = []
+            for band in self._bands(signature):
+                self.buckets.setdefault(band, []).append(position)
+        if chunk:
+            chunks.append(np.stack(chunk))
+        self.signatures = np.concatenate(chunks) if chunks else np.empty((0, NUM_BANDS * ROWS_PER_BAND), dtype=np.uint64)
+        logging.info(f"(MATCHER) - {len(self.ids)} papers loaded from the snapshot {snapshot_path}")
+
+    def _iter_snapshot(self):
+        """Reads the records of the snapshot that are indexed (their position is their index).
+
+        Yields:
+            tuple: the ID, the year, the author names and the signature of each record.
+        """
+        for record in jsonl.iter_jsonl(self.snapshot_path):
+            record = snapshot_record(record)
+            if record is None:
+                continue
+            year = _year(record[2])
+            if self.years is not None and year is not None and \
+                    not (self.years[0] - MAX_YEAR_DIFFERENCE <= year <= self.years[1] + MAX_YEAR_DIFFERENCE):
+                continue
+            title = normalize_title(record[1])
+            # the records without signature (empty titles) are not indexed
+            if not title.replace(' ', ''):
+                continue
+            yield record[0], year, record[3], minhash(title)
+
+    def _bands(self, signature):
+        for band in range(NUM_BANDS):
+            yield band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+
+    def _candidates(self, title, year):
+        """Returns the positions of the records with a similar title and a close year, with the most similar first."""
+        signature = minhash(normalize_title(title) or '')
+        if signature is None:
+            return []
+        year = _year(year)
+        # blocking by year: the candidates of other years are discarded without comparing them
+        positions = [position for position in {p for band in self._bands(signature) for p in self.buckets.get(band, [])}
+                     if year is None or self.record_years[position] is None
+                     or abs(year - self.record_years[position]) <= MAX_YEAR_DIFFERENCE]
+        if not positions:
+            return []
+        similarities = (self.signatures[positions] == signature).mean(axis=1)
+        return [position for similarity, position in sorted(zip(similarities.tolist(), positions), reverse=True)
+                if similarity >= MIN_SIMILARITY]
+
+    def resolve(self, title, year=None, authors=None):
+        """Returns the Semantic Scholar ID of a paper, or None if it is not in the snapshot.
+
+        Args:
+            title (string): title of the paper.
+            year (string, optional): year of the paper.
+            authors (list, optional): author names of the paper.
+
+        Returns:
+            string: the ID of the paper for the Semantic Scholar batch endpoint (paperId, CorpusId:id or DOI:doi).
+        """
+        return self.resolve_many([(title, year, authors)])[0]
+
+    def resolve_many(self, papers):
+        """Resolves a list of papers (tuples with the title, year and author names).
+
+        Returns:
+            list: the Semantic Scholar ID of each paper, or None if it is not in the snapshot.
+        """
+        results = []
+        for title, year, authors in papers:
+            best = None
+            for position in self._candidates(title, year):
+                other_authors = self.record_authors[position]
+                if authors and other_authors and matching.match_authors(authors, other_authors) < len(authors) / 2:
+                    continue
+                best = self.ids[position]
+                break
+            results.append(best)
+        return results
@@ -0,0 +1,122 @@
+import os
+import time
+import pandas as pd
+from auxiliar import file, jsonl
+
+
+# default directories of the data of the crawlers
+EXTENDED_DATA_DIR = './data/extended_crawler_data'
+BASE_DATA_DIR = './data/base_crawler_data'
+CITATIONS_DATA_DIR = './data/citations_crawler_data'
+
+
+class ParquetExporter:
+    """Exports the crawled data to normalized Parquet tables (papers, authors, institutions, references and citations).
+    The tables are partitioned by conference and year and the papers are identified by their S2 Paper ID or DOI (paper_key).
+    """
+    def __init__(self, conferences, years, output_dir, base_dir=BASE_DATA_DIR, extended_dir=EXTENDED_DATA_DIR,
+                 citations_dir=CITATIONS_DATA_DIR):
+        self.conferences = conferences
+        self.years = years
+        self.output_dir = output_dir
+        # directories of the data of the crawlers (the input of the export)
+        self.base_dir = base_dir
+        self.extended_dir = extended_dir
+        self.citations_dir = citations_dir
+
+    def export(self):
+        initial_time = time.time()
+        first_year, last_year = self.years
+        tables = {'papers': [], 'authors': [], 'institutions': [], 'references': [], 'citations': []}
+
+        for conf in self.conferences:
+            print(f"(EXPORT) - Exporting {conf} from {first_year} to {last_year}...")
+            data = file.load_data(f"{self.extended_dir}/{conf}_extended_data", years=range(first_year, last_year + 1))
+            if data is None:
+                data = file.load_data(f"{self.base_dir}/{conf}_basic_data", years=range(first_year, last_year + 1))
+            if data is None:
+                print(f"(EXPORT) - There is no data for the conference {conf}")
+                continue
+
+            # the citations are joined to the papers by S2 Paper ID, and by title only if the citing paper has no ID
+            keys_by_id, keys_by_title = {}, {}
+            for year, papers in data.items():
+                for paper in papers:
+                    paper_key = self._paper_key(paper)
+                    if paper.get('S2 Paper ID'):
+                        keys_by_id[paper['S2 Paper ID']] = (paper_key, str(year))
+                    keys_by_title[paper['Title']] = (paper_key, str(year))
+                    self._add_paper(tables, conf, str(year), paper_key, paper)
+
+            for title, paper_id, cited_papers in self._load_citations(conf):
+                paper_keys = keys_by_id.get(paper_id) if paper_id else keys_by_title.get(title)
+                if paper_keys is None:
+                    continue
+                paper_key, year = paper_keys
+                for cited in cited_papers:
+                    if cited is None:
+                        continue
+                    tables['citations'].append({'conference': conf, 'year': year, 'paper_key': paper_key,
+                                                'cited_title': cited.get('Title'), 'cited_venue': cited.get('Venue'),
+                                                'cited_year': str(cited['Year']) if cited.get('Year') is not None else None,
+                                                'cited_authors': [a['Author'] for a in cited.get('Authors') or []]})
+
+        for name, rows in tables.items():
+            self._write_table(name, rows)
+
+        final_time = time.time()
+        minutes = (final_time - initial_time) / 60
+        print(f"(EXPORT) - Done in {minutes:.3f} minutes")
+
+    def _paper_key(self, paper):
+        return paper.get('S2 Paper ID') or paper.get('DOI Number') or paper['Title']
+
+    def _add_paper(self, tables, conf, year, paper_key, paper):
+        tables['papers'].append({'conference': conf, 'year': year, 'paper_key': paper_key,
+                                 'title': paper['Title'],
+                                 'doi': paper.get('DOI Number'),
+                                 's2_paper_id': paper.get('S2 Paper ID'),
+                                 'openalex_link': paper.get('OpenAlex Link'),
+                                 'abstract': paper.get('Abstract'),
+                                 'tldr': paper.get('TLDR')})
+
+        for position, author in enumerate(paper.get('Authors and Institutions') or []):
+            tables['authors'].append({'conference': conf, 'year': year, 'paper_key': paper_key,
+                                      'position': position, 'author': author['Author']})
+            for institution in author.get('Institutions') or []:
+                if institution is None:
+                    continue
+                tables['institutions'].append({'conference': conf, 'year': year, 'paper_key': paper_key,
+                                               'position': position, 'author': author['Author'],
+                                               'institution': institution.get('Institution Name'),
+                                               'country': institution.get('Country')})
+
+        for work in paper.get('OpenAlex Referenced Works') or []:
+            tables['references'].append({'conference': conf, 'year': year, 'paper_key': paper_key,
+                                         'source': 'openalex', 'referenced_id': work, 'referenced_title': None})
+        for reference in paper.get('Citations S2') or []:
+            tables['references'].append({'conference': conf, 'year': year, 'paper_key': paper_key,
+                                         'source': 's2', 'referenced_id': reference.get('paperId'),
+                                         'referenced_title': reference.get('title')})
+
+    def _load_citations(self, conf):
+        """Returns the title, the S2 Paper ID (None in the JSON layout, which is by title) and the cited papers of the citing
+        papers of a conference (JSON or JSON Lines).
+        """
+        file_path = f"{self.citations_dir}/{conf}_citations_data"
+        if file.exists_file(file_path):
+            return ((title, None, cited_papers) for title, cited_papers in file.load_json(file_path).items())
+        path = jsonl.find_jsonl(file_path)
+        if path is not None:
+            return ((record['Title'], record.get('S2 Paper ID'), record['Cited Papers']) for record in jsonl.iter_jsonl(path))
+        return []
+
+    def _write_table(self, name, rows):
+        if not rows:
+            return
+        df = pd.DataFrame(rows)
+        path = os.path.join(self.output_dir, name)
+        os.makedirs(path, exist_ok=True)
+        # the strings are dictionary encoded, so the repeated values (authors, institutions, countries) take little space
+        df.to_parquet(path, engine='pyarrow', partition_cols=['conference', 'year'], index=False, use_dictionary=True,
+                      existing_data_behavior='delete_matching')
@@ -1,12 +1,19 @@
 import os
 import json
 from dotenv import load_dotenv
+from auxiliar import jsonl, records
 
 
 def save_json(file_path, data):
     file_path = f'{file_path}.json'
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # the data is written to a temporary file first, so a crash never leaves a half written file
+    tmp_path = f'{file_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4, default=records.to_json)
+    os.replace(tmp_path, file_path)
     
 
 def load_json(file_path):
@@ -34,7 +41,112 @@ def load_partial_data(file_path, year):
     return data[str(year)]
 
 
+def exists_data(file_path):
+    """Checks if a data file exists, in JSON or in JSON Lines format."""
+    return exists_file(file_path) or jsonl.find_jsonl(file_path) is not None
+
+
+def load_data(file_path, years=None):
+    """Loads a data file (by year) in JSON or in JSON Lines format. Only the selected years are returned. The JSON Lines
+    files are read one record at a time, so only the records of the selected years are kept in memory.
+
+    Args:
+        file_path (string): path of the file (without extension).
+        years (list, optional): the years to load. By default, all the years are loaded.
+
+    Returns:
+        dict: dictionary with the year as key and the list of papers as value, or None if the file does not exist.
+    """
+    years = {str(year) for year in years} if years is not None else None
+    if exists_file(file_path):
+        data = load_json(file_path)
+        if years is None:
+            return data
+        return {year: papers for year, papers in data.items() if year in years}
+    path = jsonl.find_jsonl(file_path)
+    if path is None:
+        return None
+    data = {}
+    for record in jsonl.iter_jsonl(path):
+        year = str(record['Year'])
+        if years is None or year in years:
+            data.setdefault(year, []).append(record)
+    return data
+
+
+def append_checkpoint(file_path, unit, data, offset=None):
+    """Appends a completed unit of work to a checkpoint file (one JSON per line) and flushes it to disk.
+
+    Args:
+        file_path (string): path of the checkpoint file (without extension).
+        unit (string): identifier of the unit of work.
+        data (dict): data obtained in the unit of work.
+        offset (int, optional): size of the JSON Lines output file once the unit of work has been written in it.
+    """
+    entry = {'Unit': unit, 'Data': data}
+    if offset is not None:
+        entry['Offset'] = offset
+    _append_entries(file_path, [entry])
+
+
+def append_checkpoint_units(file_path, units, offset=None):
+    """Appends several completed units of work without data to a checkpoint file, flushing it to disk only once.
+
+    Args:
+        file_path (string): path of the checkpoint file (without extension).
+        units (list): identifiers of the units of work.
+        offset (int, optional): size of the JSON Lines output file once the units of work have been written in it.
+    """
+    entries = [{'Unit': unit, 'Data': {}} for unit in units]
+    if offset is not None:
+        for entry in entries:
+            entry['Offset'] = offset
+    _append_entries(file_path, entries)
+
+
+def _append_entries(file_path, entries):
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f'{file_path}.jsonl', 'a', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(entry, ensure_ascii=False, default=records.to_json) + '\n' for entry in entries))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_checkpoint(file_path):
+    """Loads the units of work saved in a checkpoint file. An incomplete last line (a crash while writing) is ignored.
+
+    Args:
+        file_path (string): path of the checkpoint file (without extension).
+
+    Returns:
+        list: list of dictionaries with the identifier (Unit), the data (Data) and the offset (Offset, optional) of each unit of work.
+    """
+    units = []
+    if not os.path.exists(f'{file_path}.jsonl'):
+        return units
+    with open(f'{file_path}.jsonl', 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            units.append(entry)
+    return units
+
+
+def remove_checkpoint(file_path):
+    if os.path.exists(f'{file_path}.jsonl'):
+        os.remove(f'{file_path}.jsonl')
+
+
 def api_key_in_env():
     load_dotenv()
     api_key = os.getenv("S2_API_KEY", None)
-    return api_key
\ No newline at end of file
+    return api_key
+
+def openalex_email_in_env():
+    load_dotenv()
+    email = os.getenv("OPENALEX_EMAIL", None)
+    return email
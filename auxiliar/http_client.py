@@ -0,0 +1,297 @@
+import time
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from auxiliar.cache import ResponseCache, CachedResponse, DEFAULT_CACHE_PATH, DEFAULT_MAX_SIZE
+from auxiliar.rate_limiter import AdaptiveRateLimiter
+from auxiliar.metrics import metrics
+
+_cache = None
+_engine = None
+
+# timeout (connect, read) in seconds of the requests that do not set one
+DEFAULT_TIMEOUT = (10, 60)
+# retry policy of all the requests: the responses with these status codes (and the connection errors) are retried
+# after waiting BACKOFF_BASE * 2^attempt seconds (with jitter), or the time of the Retry-After header if it is longer
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+# brotli is only accepted when the brotli package is installed (urllib3 needs it to decode the responses)
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# the connection pools are shared by the sessions of all the threads, each thread has its own session
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+_local = threading.local()
+
+# initial and maximum requests per second of each host, depending on the credentials (tier): the Semantic Scholar
+# API key and the email of the OpenAlex polite pool. The rate of each host is adapted between them to the responses.
+HOST_RATE_TIERS = {
+    'api.semanticscholar.org': {'key': (1, 1), 'no_key': (0.5, 1)},
+    'api.openalex.org': {'key': (10, 10), 'no_key': (5, 10)},
+    'dblp.org': {'key': (5, 10), 'no_key': (5, 10)},
+}
+DEFAULT_RATE = (5, 10)
+
+# credentials of the APIs, sent in the headers of the requests to their host
+_credentials = {}
+# adaptive rate limiters of the hosts, shared by all the threads and by the async engine
+_limiters = {}
+_limiters_lock = threading.Lock()
+# base URLs that replace the hosts of the requests when they are sent (e.g. a local mock server in the benchmark)
+_redirects = {}
+
+
+def configure_cache(path=DEFAULT_CACHE_PATH, max_size=DEFAULT_MAX_SIZE, offline=False):
+    """Enables the on-disk response cache shared by all the crawlers.
+
+    Args:
+        path (string, optional): path of the SQLite file of the cache.
+        max_size (int, optional): maximum size of the cache in bytes.
+        offline (bool, optional): if True, only the cached responses are used and no request is sent.
+    """
+    global _cache
+    if _cache is not None:
+        _cache.flush()
+    _cache = ResponseCache(path, max_size=max_size, offline=offline)
+
+
+def configure_engine(engine):
+    """Selects the engine used to send the requests.
+
+    Args:
+        engine (string): 'threads' to send the requests with requests (blocking) or 'async' to send them with the asyncio engine.
+    """
+    global _engine
+    if _engine is not None:
+        _engine.close()
+        _engine = None
+    if engine == 'async':
+        from auxiliar.async_engine import AsyncEngine
+        _engine = AsyncEngine(get_limiter, target_url=target_url)
+
+
+def configure_credentials(s2_api_key=None, openalex_email=None):
+    """Sets the credentials of the APIs. They are sent with every request to their host and they select the rate tier of the host.
+
+    Args:
+        s2_api_key (string, optional): Semantic Scholar API key.
+        openalex_email (string, optional): email used to join the OpenAlex polite pool.
+    """
+    _credentials.clear()
+    if s2_api_key is not None:
+        _credentials['api.semanticscholar.org'] = {'x-api-key': s2_api_key}
+    if openalex_email is not None:
+        _credentials['api.openalex.org'] = {'User-Agent': f'conference-crawler (mailto:{openalex_email})'}
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def get_limiter(host):
+    """Returns the rate limiter of a host (created the first time with the rates of its tier)."""
+    with _limiters_lock:
+        if host not in _limiters:
+            tiers = HOST_RATE_TIERS.get(host)
+            if tiers is None:
+                rate, max_rate = DEFAULT_RATE
+            else:
+                rate, max_rate = tiers['key' if host in _credentials else 'no_key']
+            _limiters[host] = AdaptiveRateLimiter(rate, max_rate=max_rate)
+        return _limiters[host]
+
+
+def configure_redirects(redirects=None):
+    """Sends the requests of some hosts to another base URL. The cache, the rate limiters, the credentials and the
+    metrics still use the original host, so the crawlers behave as with the real APIs.
+
+    Args:
+        redirects (dict, optional): dictionary with the host as key and the base URL as value
+            (e.g. {'dblp.org': 'http://127.0.0.1:8000/dblp.org'}). None removes the redirections.
+    """
+    _redirects.clear()
+    if redirects is not None:
+        _redirects.update({host.lower(): base_url.rstrip('/') for host, base_url in redirects.items()})
+
+
+def target_url(url):
+    """Returns the URL where a request is sent (the same URL if its host is not redirected)."""
+    if not _redirects:
+        return url
+    parsed = urlparse(url)
+    base_url = _redirects.get(parsed.netloc.lower())
+    if base_url is None:
+        return url
+    return base_url + url[len(f"{parsed.scheme}://{parsed.netloc}"):]
+
+
+def configure_pool(num_workers):
+    """Sets the number of connections kept open to each host, so every worker can reuse its own connection.
+
+    Args:
+        num_workers (int): number of threads that send requests at the same time.
+    """
+    global _adapter
+    _adapter.close()
+    _adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max(10, num_workers))
+    _local.__dict__.clear()
+
+
+def _session():
+    """Returns the requests.Session of the current thread (created the first time)."""
+    session = getattr(_local, 'session', None)
+    if session is None or session.adapters.get('https://') is not _adapter:
+        session = requests.Session()
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        session.mount('https://', _adapter)
+        session.mount('http://', _adapter)
+        _local.session = session
+    return session
+
+
+def close():
+    configure_engine('threads')
+    _adapter.close()
+    if _cache is not None:
+        _cache.flush()
+
+
+def is_offline():
+    return _cache is not None and _cache.offline
+
+
+def get(url, params=None, headers=None, timeout=None, max_age=None):
+    return request('GET', url, params=params, headers=headers, timeout=timeout, max_age=max_age)
+
+
+def post(url, params=None, json=None, headers=None, timeout=None):
+    return request('POST', url, params=params, json=json, headers=headers, timeout=timeout)
+
+
+def request(method, url, params=None, json=None, headers=None, timeout=None, max_age=None):
+    """Makes an HTTP request using the response cache if it is enabled. Only the successful responses are stored.
+    In offline mode a request that is not cached returns a 504 response (as the HTTP only-if-cached directive).
+    The requests sent to the network wait for the rate limiter of their host and they are retried with the retry policy.
+    The credentials of the host (see configure_credentials) are added to the headers.
+
+    Args:
+        method (string): HTTP method of the request.
+        url (string): URL of the request.
+        params (dict, optional): query parameters of the request.
+        json (object, optional): JSON body of the request.
+        headers (dict, optional): headers of the request (they are not part of the cache key).
+        timeout (float, optional): timeout of the request in seconds (DEFAULT_TIMEOUT by default).
+        max_age (float, optional): maximum age in seconds of a cached response (the TTL of the host is used by default).
+
+    Returns:
+        response object: the response of the request (requests.Response or CachedResponse).
+    """
+    return request_many([{'method': method, 'url': url, 'params': params, 'json': json, 'headers': headers,
+                          'timeout': timeout, 'max_age': max_age}])[0]
+
+
+def request_many(requests_args):
+    """Makes a list of requests and returns the responses in the same order. With the async engine the requests that
+    are not cached are sent concurrently, otherwise they are sent one after another.
+    The requests that fail with a status code of RETRY_STATUS_CODES or a connection error are retried up to MAX_RETRIES times.
+
+    Args:
+        requests_args (list): list of dictionaries with the arguments of request (method, url, params, json, headers, timeout, max_age).
+
+    Returns:
+        list: the responses of the requests.
+    """
+    responses = [None] * len(requests_args)
+    pending = []
+    for i, args in enumerate(requests_args):
+        args = {'params': None, 'json': None, 'headers': None, 'timeout': None, **args}
+        max_age = args.pop('max_age', None)
+        if args['timeout'] is None:
+            args['timeout'] = DEFAULT_TIMEOUT
+        credentials = _credentials.get(urlparse(args['url']).netloc.lower())
+        if credentials is not None:
+            args['headers'] = {**credentials, **(args['headers'] or {})}
+        if _cache is not None:
+            cached = _cache.get(args['method'], args['url'], args['params'], args['json'], max_age=max_age)
+            metrics.record_cache(urlparse(args['url']).netloc.lower(), cached is not None)
+            if cached is not None:
+                responses[i] = cached
+                continue
+            if _cache.offline:
+                responses[i] = CachedResponse(args['url'], 504, {}, b'', from_cache=False)
+                continue
+        pending.append((i, args))
+
+    attempt = 0
+    while pending:
+        if _engine is not None:
+            sent = _engine.request_many([args for _, args in pending])
+        else:
+            sent = [_send_safe(**args) for _, args in pending]
+
+        retry = []
+        delay = 0
+        for (i, args), response in zip(pending, sent):
+            if not isinstance(response, Exception):
+                get_limiter(urlparse(args['url']).netloc.lower()).update(response.status_code, response.headers)
+            if _should_retry(response) and attempt < MAX_RETRIES:
+                metrics.record_retry(urlparse(args['url']).netloc.lower())
+                retry.append((i, args))
+                delay = max(delay, _retry_delay(response, attempt))
+                continue
+            if isinstance(response, Exception):
+                raise response
+            if _cache is not None and response.status_code == 200:
+                _cache.put(args['method'], args['url'], args['params'], args['json'], response)
+            responses[i] = response
+
+        if retry:
+            logging.warning(f"(HTTP) - Retrying {len(retry)} requests in {delay:.1f} seconds")
+            time.sleep(delay)
+        pending = retry
+        attempt += 1
+    return responses
+
+
+def _should_retry(response):
+    if isinstance(response, Exception):
+        return True
+    return response.status_code in RETRY_STATUS_CODES
+
+
+def _retry_delay(response, attempt):
+    """Returns the seconds to wait before the next attempt: exponential backoff with jitter, or the Retry-After header of the response."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+    if not isinstance(response, Exception):
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None and retry_after.strip().isdigit():
+            delay = max(delay, min(BACKOFF_MAX, float(retry_after)))
+    return delay
+
+
+def _send_safe(**args):
+    # the connection errors are returned instead of raised, so they can be retried
+    try:
+        return _send(**args)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        return e
+
+
+def _send(method, url, params=None, json=None, headers=None, timeout=None):
+    host = urlparse(url).netloc.lower()
+    get_limiter(host).acquire()
+    start = time.monotonic()
+    try:
+        response = _session().request(method, target_url(url), params=params, json=json, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        metrics.record_request(host, None, time.monotonic() - start)
+        raise
+    # the bytes received are the ones read from the connection (compressed), not the size of the decoded body
+    metrics.record_request(host, response.status_code, time.monotonic() - start, response.raw.tell())
+    return response
@@ -0,0 +1,114 @@
+import os
+import logging
+import threading
+from auxiliar import file, http_client
+from auxiliar.single_flight import SingleFlight
+
+
+DEFAULT_TABLE_PATH = './data/cache/institutions'
+OPENALEX_INSTITUTIONS_URL = 'https://api.openalex.org/institutions'
+# maximum number of values that OpenAlex accepts in an OR filter
+MAX_IDS_PER_REQUEST = 50
+
+
+class InstitutionTable:
+    """Thread-safe table that maps OpenAlex institution IDs to their name and country.
+    It is shared by the whole process and persisted between executions in a JSON file.
+    """
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.institutions = {}
+        self.modified = False
+        # the institutions requested by a thread are not requested again by the threads that need them at the same time
+        self.flights = SingleFlight(max_size=0)
+        data = file.load_json(path)
+        if data is not None:
+            self.institutions = data
+
+    def add(self, institution):
+        """Adds to the table the data of an institution of an OpenAlex authorship (if it has it).
+
+        Args:
+            institution (dict): institution object of an OpenAlex authorship or institution response.
+
+        Returns:
+            string: the OpenAlex ID of the institution (without the https://openalex.org/ prefix).
+        """
+        id_inst = self._short_id(institution.get('id'))
+        if id_inst is None or institution.get('display_name') is None:
+            return id_inst
+        with self.lock:
+            if id_inst not in self.institutions:
+                self.institutions[id_inst] = {'Institution Name': institution.get('display_name'),
+                                              'Country': institution.get('country_code')}
+                self.modified = True
+        return id_inst
+
+    def get(self, id_inst):
+        with self.lock:
+            return self.institutions.get(id_inst, None)
+
+    def resolve(self, ids):
+        """Returns the data of a list of institutions. The IDs that are not in the table are requested to OpenAlex
+        in bulk using the filter openalex_id:a|b|c.
+
+        Args:
+            ids (list): list of OpenAlex institution IDs.
+
+        Returns:
+            dict: dictionary with the ID as key and the institution data (or None if it was not found) as value.
+        """
+        with self.lock:
+            missing = list(dict.fromkeys(i for i in ids if i is not None and i not in self.institutions))
+
+        if missing:
+            self.flights.get_many(missing, self._fetch_institutions)
+
+        with self.lock:
+            return {i: self.institutions.get(i, None) for i in ids}
+
+    def _fetch_institutions(self, ids):
+        batches = [ids[ini:ini + MAX_IDS_PER_REQUEST] for ini in range(0, len(ids), MAX_IDS_PER_REQUEST)]
+        self._request_institutions(batches)
+        with self.lock:
+            return {i: self.institutions[i] for i in ids if i in self.institutions}
+
+    def _request_institutions(self, batches):
+        requests_args = [{'method': 'GET', 'url': OPENALEX_INSTITUTIONS_URL,
+                          'params': {'filter': f"openalex_id:{'|'.join(ids)}", 'per-page': MAX_IDS_PER_REQUEST}}
+                         for ids in batches]
+        for ids, response in zip(batches, http_client.request_many(requests_args)):
+            if response.status_code == 200:
+                for institution in response.json().get('results', []):
+                    self.add(institution)
+            else:
+                logging.error(f"(INSTITUTIONS) - {response.status_code} in request for institutions {ids}")
+
+    def save(self):
+        with self.lock:
+            if not self.modified:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file.save_json(self.path, self.institutions)
+            self.modified = False
+
+    def _short_id(self, id_inst):
+        if id_inst is None:
+            return None
+        return id_inst.replace("https://openalex.org/", "")
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_institution_table():
+    """Returns the institution table of the process (it is loaded the first time it is used)."""
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = InstitutionTable()
+        return _table
@@ -0,0 +1,176 @@
+import io
+import os
+import json
+import gzip
+import time
+import queue
+import threading
+from auxiliar import records
+
+
+# extension of the files for each type of compression
+EXTENSIONS = {None: '.jsonl', 'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+# the writer thread writes a batch when it has BATCH_SIZE records or after FLUSH_INTERVAL seconds
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+
+
+def jsonl_path(file_path, compression=None):
+    return f'{file_path}{EXTENSIONS[compression]}'
+
+
+def find_jsonl(file_path):
+    """Returns the path of the JSON Lines file (with any compression) of a file path without extension, or None if it does not exist."""
+    for compression in EXTENSIONS:
+        path = jsonl_path(file_path, compression)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _compression_of(path):
+    for compression, extension in EXTENSIONS.items():
+        if compression is not None and path.endswith(extension):
+            return compression
+    return None
+
+
+def _compress(data, compression):
+    if compression == 'gzip':
+        return gzip.compress(data)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def iter_jsonl(path):
+    """Reads a JSON Lines file (plain, gzip or zstd) one record at a time.
+    A truncated end of file (a crash while writing) is ignored.
+
+    Args:
+        path (string): path of the file.
+
+    Yields:
+        dict: each record of the file.
+    """
+    compression = _compression_of(path)
+    if compression == 'gzip':
+        f = gzip.open(path, 'rt', encoding='utf-8')
+    elif compression == 'zstd':
+        import zstandard
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        f = io.TextIOWrapper(raw, encoding='utf-8')
+    else:
+        f = open(path, 'r', encoding='utf-8')
+
+    with f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    return
+                yield record
+        except EOFError:
+            return
+
+
+def to_nested(path, key='Year', value=None):
+    """Builds the nested dictionary layout of the JSON files from a JSON Lines file.
+
+    Args:
+        path (string): path of the JSON Lines file.
+        key (string, optional): field of the records used as key. Defaults to 'Year'.
+        value (string, optional): field of the records used as value. By default, the records are grouped in lists.
+
+    Returns:
+        dict: the nested dictionary.
+    """
+    nested = {}
+    for record in iter_jsonl(path):
+        if value is None:
+            nested.setdefault(str(record[key]), []).append(record)
+        else:
+            nested[record[key]] = record[value]
+    return dict(sorted(nested.items())) if value is None else nested
+
+
+class JsonlWriter:
+    """Writes records to a JSON Lines file while the crawl is running. The records are written by a thread in batches,
+    each batch is compressed independently (gzip members and zstd frames can be concatenated) and flushed to disk.
+
+    The records can be sent together with the identifier of the unit of work that produced them. Once a batch is on disk,
+    on_commit is called with the units of the batch and the size of the file, so the file can be truncated to that size
+    to discard the records of the units that were not completed.
+    """
+    def __init__(self, path, compression=None, append=False, on_commit=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.compression = compression
+        self.on_commit = on_commit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.error = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'ab' if append else 'wb')
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, batch, unit=None):
+        """Sends a list of records to the writer thread.
+
+        Args:
+            batch (list): the records to write.
+            unit (string, optional): identifier of the unit of work that produced the records.
+        """
+        self.queue.put((batch, unit))
+
+    def close(self):
+        """Writes the pending records and closes the file."""
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        closing = False
+        while not closing:
+            item = self.queue.get()
+            items = []
+            num_records = 0
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None:
+                items.append(item)
+                num_records += len(item[0])
+                if num_records >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            else:
+                closing = True
+
+            try:
+                self._write_batch(items)
+            except Exception as e:
+                self.error = e
+                return
+
+    def _write_batch(self, items):
+        data = b''.join(json.dumps(record, ensure_ascii=False, default=records.to_json).encode('utf-8') + b'\n'
+                        for batch, _ in items for record in batch)
+        if data:
+            self.file.write(_compress(data, self.compression))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        units = [unit for _, unit in items if unit is not None]
+        if self.on_commit is not None and units:
+            self.on_commit(units, self.file.tell())
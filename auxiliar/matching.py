@@ -0,0 +1,84 @@
+import unicodedata
+from functools import lru_cache
+from rapidfuzz import fuzz, process
+
+
+# minimum similarity (0-100) of two names to consider that they are the same author
+AUTHOR_SIMILARITY = 75
+
+
+@lru_cache(maxsize=200000)
+def normalize_name(name):
+    """Normalizes a name to compare it: without accents and in lower case. The result is memoized,
+    so the authors that appear in many papers are only normalized once.
+    """
+    name = ''.join(c for c in unicodedata.normalize('NFD', name) if unicodedata.category(c) != 'Mn')
+    return name.lower().strip()
+
+
+def _strip_dot(title):
+    title = title.strip().lower()
+    return title[:-1] if title.endswith('.') else title
+
+
+def _assign(scores, threshold):
+    """Assigns each row to at most one column (and the other way around) taking the pairs with the highest scores first.
+    Returns the number of pairs with a score of at least threshold.
+    """
+    pairs = sorted(((score, i, j) for i, row in enumerate(scores) for j, score in enumerate(row) if score >= threshold),
+                   reverse=True)
+    used_rows, used_columns = set(), set()
+    for _, i, j in pairs:
+        if i not in used_rows and j not in used_columns:
+            used_rows.add(i)
+            used_columns.add(j)
+    return len(used_rows)
+
+
+def match_authors(authors, candidate_authors, threshold=AUTHOR_SIMILARITY):
+    """Counts the authors of a paper that are also in the authors of a candidate paper, in any order.
+
+    Args:
+        authors (list): names of the authors of the paper.
+        candidate_authors (list): names of the authors of the candidate paper.
+        threshold (int, optional): minimum similarity of two names. Defaults to AUTHOR_SIMILARITY.
+
+    Returns:
+        int: the number of authors matched.
+    """
+    if not authors or not candidate_authors:
+        return 0
+    scores = process.cdist([normalize_name(a) for a in authors], [normalize_name(a) for a in candidate_authors],
+                           scorer=fuzz.ratio)
+    return _assign(scores.tolist(), threshold)
+
+
+def verify_papers(papers, candidates, threshold=AUTHOR_SIMILARITY):
+    """Checks if the candidates found (e.g. by a title search) are the papers searched. A candidate is accepted if it has
+    the same title, or the same number of authors and at least half of them match (in any order).
+    It is meant to be called with all the candidates of a conference-year: the names are normalized once for all of them
+    and each paper is only scored against the authors of its own candidate.
+
+    Args:
+        papers (list): tuples (title, author names) of the papers searched.
+        candidates (list): tuples (title, author names) of the candidate of each paper, or None if there is no candidate.
+        threshold (int, optional): minimum similarity of two names. Defaults to AUTHOR_SIMILARITY.
+
+    Returns:
+        list: True for each candidate accepted and False otherwise.
+    """
+    results = [False] * len(papers)
+    to_score = []
+    for i, (paper, candidate) in enumerate(zip(papers, candidates)):
+        if candidate is None:
+            continue
+        (title, authors), (candidate_title, candidate_authors) = paper, candidate
+        if title and candidate_title and _strip_dot(title) == _strip_dot(candidate_title):
+            results[i] = True
+        elif authors and len(authors) == len(candidate_authors):
+            to_score.append((i, authors, candidate_authors))
+
+    # the matrix of each paper only has its authors (rows) and the authors of its candidate (columns)
+    for i, authors, candidate_authors in to_score:
+        results[i] = match_authors(authors, candidate_authors, threshold) >= len(authors) / 2
+    return results
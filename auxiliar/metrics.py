@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+DEFAULT_METRICS_PATH = './log/metrics.json'
+# upper bounds (in seconds) of the buckets of the latency and parse time histograms
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float('inf'))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def to_dict(self):
+        # cumulative counts, as the buckets of Prometheus
+        cumulative, buckets = 0, {}
+        for bound, count in zip(HISTOGRAM_BUCKETS, self.counts):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        return {'count': self.count, 'sum': round(self.sum, 6), 'mean': round(self.sum / self.count, 6) if self.count else None,
+                'buckets': buckets}
+
+
+class Metrics:
+    """Thread-safe collector of the metrics of a crawl: the requests of each host (count by status code, latency, retries,
+    bytes and cache hits), the time spent parsing and the items processed by each stage.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.start = time.time()
+            self.hosts = {}
+            self.timers = {}
+            self.stages = {}
+
+    def _host(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = {'requests': 0, 'status': {}, 'errors': 0, 'retries': 0, 'bytes': 0,
+                                'cache_hits': 0, 'cache_misses': 0, 'latency': Histogram()}
+        return self.hosts[host]
+
+    def record_request(self, host, status_code, latency, num_bytes=0):
+        """Records a request sent to the network (status_code is None if there was a connection error). num_bytes is the
+        size of the body received, as it was transferred (compressed).
+        """
+        with self.lock:
+            metrics = self._host(host)
+            metrics['requests'] += 1
+            if status_code is None:
+                metrics['errors'] += 1
+            else:
+                metrics['status'][str(status_code)] = metrics['status'].get(str(status_code), 0) + 1
+            metrics['bytes'] += num_bytes
+            metrics['latency'].observe(latency)
+
+    def record_retry(self, host):
+        with self.lock:
+            self._host(host)['retries'] += 1
+
+    def record_cache(self, host, hit):
+        with self.lock:
+            self._host(host)['cache_hits' if hit else 'cache_misses'] += 1
+
+    def record_time(self, name, seconds):
+        with self.lock:
+            self.timers.setdefault(name, Histogram()).observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Measures the time of a block of code (e.g. parsing a page) with the CPU time of the thread."""
+        start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.thread_time() - start)
+
+    def record_items(self, stage, num_items=1, failed=False):
+        """Records the items processed by a stage (or crawler). The items whose function raised an exception are
+        recorded as failed, so they are not counted as processed.
+        """
+        now = time.time()
+        with self.lock:
+            metrics = self.stages.setdefault(stage, {'items': 0, 'failed': 0, 'first': now, 'last': now})
+            metrics['failed' if failed else 'items'] += num_items
+            metrics['last'] = now
+
+    def to_dict(self):
+        with self.lock:
+            hosts = {}
+            for host, metrics in self.hosts.items():
+                lookups = metrics['cache_hits'] + metrics['cache_misses']
+                hosts[host] = {**metrics, 'latency': metrics['latency'].to_dict(),
+                               'throttled': metrics['status'].get('429', 0),
+                               'cache_hit_rate': round(metrics['cache_hits'] / lookups, 4) if lookups else None}
+            stages = {}
+            for stage, metrics in self.stages.items():
+                elapsed = metrics['last'] - metrics['first']
+                stages[stage] = {'items': metrics['items'], 'failed': metrics['failed'], 'seconds': round(elapsed, 3),
+                                 'items_per_second': round(metrics['items'] / elapsed, 3) if elapsed > 0 else None}
+            return {'started': self.start, 'duration': round(time.time() - self.start, 3), 'hosts': hosts,
+                    'timers': {name: histogram.to_dict() for name, histogram in self.timers.items()}, 'stages': stages}
+
+    def write_json(self, path=DEFAULT_METRICS_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def write_prometheus(self, path):
+        """Writes the metrics in the Prometheus text format (e.g. for the textfile collector of the node exporter)."""
+        data = self.to_dict()
+        lines = []
+
+        def add(name, kind, samples):
+            lines.append(f'# TYPE crawler_{name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{value_}"' for key, value_ in labels.items())
+                lines.append(f'crawler_{name}{{{label_text}}} {value}')
+
+        hosts = data['hosts']
+        add('requests_total', 'counter', [({'host': h, 'status': s}, c) for h, m in hosts.items() for s, c in m['status'].items()])
+        add('request_errors_total', 'counter', [({'host': h}, m['errors']) for h, m in hosts.items()])
+        add('retries_total', 'counter', [({'host': h}, m['retries']) for h, m in hosts.items()])
+        add('response_bytes_total', 'counter', [({'host': h}, m['bytes']) for h, m in hosts.items()])
+        add('cache_hits_total', 'counter', [({'host': h}, m['cache_hits']) for h, m in hosts.items()])
+        add('cache_misses_total', 'counter', [({'host': h}, m['cache_misses']) for h, m in hosts.items()])
+        for name, histograms in (('request_latency_seconds', {h: m['latency'] for h, m in hosts.items()}),
+                                 ('time_seconds', data['timers'])):
+            label = 'host' if name == 'request_latency_seconds' else 'name'
+            lines.append(f'# TYPE crawler_{name} histogram')
+            for key, histogram in histograms.items():
+                for bound, count in histogram['buckets'].items():
+                    lines.append(f'crawler_{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+                lines.append(f'crawler_{name}_sum{{{label}="{key}"}} {histogram["sum"]}')
+                lines.append(f'crawler_{name}_count{{{label}="{key}"}} {histogram["count"]}')
+        add('stage_items_total', 'counter', [({'stage': s}, m['items']) for s, m in data['stages'].items()])
+        add('stage_failed_items_total', 'counter', [({'stage': s}, m['failed']) for s, m in data['stages'].items()])
+        add('stage_items_per_second', 'gauge', [({'stage': s}, m['items_per_second'] or 0) for s, m in data['stages'].items()])
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+metrics = Metrics()
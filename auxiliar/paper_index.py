@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+import unicodedata
+from auxiliar import records
+
+
+DEFAULT_INDEX_PATH = './data/cache/paper_index.sqlite'
+# maximum number of values in each SELECT ... IN (...) query
+MAX_IDS_PER_QUERY = 500
+OPENALEX_ID_PATTERN = re.compile(r'(W\d+)$')
+# version of the layout of the index. An index with an older version is rebuilt (see CitationsCrawler._index_papers)
+INDEX_VERSION = 1
+
+
+def normalize_title(title):
+    """Normalizes a title to compare it: without accents, punctuation and repeated spaces, and in lower case."""
+    if title is None:
+        return None
+    title = ''.join(c for c in unicodedata.normalize('NFD', title) if unicodedata.category(c) != 'Mn')
+    title = re.sub(r'[^\w\s]', ' ', title.lower())
+    return ' '.join(title.split())
+
+
+class PaperIndex:
+    """Index of the crawled papers of all the conferences stored on disk using SQLite.
+    Each paper is stored once with a compact record (title, conference, year and authors) and it can be found by its
+    S2 Paper ID, DOI, OpenAlex ID or normalized title without loading the data of the conferences.
+    """
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] < INDEX_VERSION:
+            # the keys of the first version did not have the year
+            self.conn.execute('DROP TABLE IF EXISTS papers')
+            self.conn.execute('DROP TABLE IF EXISTS aliases')
+            self.conn.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS papers (
+                                paper_key TEXT PRIMARY KEY,
+                                title TEXT,
+                                conference TEXT,
+                                year TEXT,
+                                authors TEXT)""")
+        # the identifiers of the papers (s2, doi, openalex and title) are stored as "{type}:{value}"
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS aliases (
+                                alias TEXT PRIMARY KEY,
+                                paper_key TEXT)""")
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_conference ON papers(conference)')
+        self.conn.commit()
+
+    def add_papers(self, conf, papers):
+        """Adds (or updates) the papers of a conference. It is called after every unit of the extended crawler.
+
+        Args:
+            conf (string): the name of the conference.
+            papers (list): the papers with the fields of the extended data.
+        """
+        rows, aliases = [], []
+        for paper in papers:
+            title = normalize_title(paper.get('Title'))
+            if not title:
+                continue
+            # the same title can be in several years of a conference (e.g. a keynote or a workshop summary)
+            year = paper.get('Year')
+            paper_key = f"{conf}:{year}:{title}"
+            rows.append((paper_key, paper['Title'], conf, str(year) if year is not None else None,
+                         json.dumps(paper.get('Authors and Institutions'), ensure_ascii=False, default=records.to_json)))
+            for id_type, value in self._paper_ids(paper).items():
+                if value is not None:
+                    aliases.append((f"{id_type}:{value}", paper_key))
+
+        with self.lock:
+            self.conn.executemany('INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?, ?)', rows)
+            self.conn.executemany('INSERT OR REPLACE INTO aliases VALUES (?, ?)', aliases)
+            self.conn.commit()
+
+    def _paper_ids(self, paper):
+        doi = paper.get('DOI Number')
+        openalex = OPENALEX_ID_PATTERN.search(paper.get('OpenAlex Link') or '')
+        return {'s2': paper.get('S2 Paper ID'),
+                'doi': doi.lower() if doi else None,
+                'openalex': openalex.group(1) if openalex else None,
+                'title': normalize_title(paper.get('Title'))}
+
+    def has_conference(self, conf):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM papers WHERE conference = ? LIMIT 1', (conf,)).fetchone() is not None
+
+    def get(self, id_type, value):
+        """Returns the record of a paper or None if it is not in the index.
+
+        Args:
+            id_type (string): type of the identifier (s2, doi, openalex or title).
+            value (string): the identifier.
+
+        Returns:
+            dict: the title, conference, year and authors of the paper.
+        """
+        return self.get_many(id_type, [value]).get(value, None)
+
+    def get_many(self, id_type, values):
+        """Returns the records of a list of papers of the same type of identifier.
+
+        Args:
+            id_type (string): type of the identifier (s2, doi, openalex or title).
+            values (list): the identifiers.
+
+        Returns:
+            dict: dictionary with the identifier as key and the record as value (only the papers in the index).
+        """
+        keys = {}
+        for value in values:
+            if value is None:
+                continue
+            if id_type == 'doi':
+                keys[f"doi:{value.lower()}"] = value
+            elif id_type == 'title':
+                keys[f"title:{normalize_title(value)}"] = value
+            else:
+                keys[f"{id_type}:{value}"] = value
+        aliases = list(keys)
+
+        found = {}
+        with self.lock:
+            for ini in range(0, len(aliases), MAX_IDS_PER_QUERY):
+                batch = aliases[ini:ini + MAX_IDS_PER_QUERY]
+                placeholders = ', '.join('?' * len(batch))
+                rows = self.conn.execute(f"""SELECT a.alias, p.title, p.conference, p.year, p.authors
+                                             FROM aliases a JOIN papers p ON a.paper_key = p.paper_key
+                                             WHERE a.alias IN ({placeholders})""", batch)
+                for alias, title, conference, year, authors in rows:
+                    found[keys[alias]] = {'Title': title, 'Conference': conference, 'Year': year,
+                                          'Authors and Institutions': json.loads(authors)}
+        return found
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_paper_index():
+    """Returns the paper index of the process (it is opened the first time it is used)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PaperIndex()
+        return _index
@@ -0,0 +1,101 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+
+class RateLimiter:
+    """Thread-safe token bucket. Each request takes one token and the tokens are refilled at `rate` tokens per second,
+    up to `capacity` tokens (the maximum burst of requests).
+
+    The tokens are reserved: reserve takes a token even if there is none and returns the time to wait for it,
+    so the same limiter can be used by the threads (acquire) and by the coroutines of the async engine (await asyncio.sleep).
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        # last_refill is in the future while the host is paused (see AdaptiveRateLimiter.pause)
+        if now > self.last_refill:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+    def reserve(self):
+        """Takes a token and returns the seconds to wait before sending the request."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            return max(0, self.last_refill - now) + max(0, -self.tokens) / self.rate
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket whose rate is adapted to the responses of the host (AIMD: additive increase, multiplicative decrease).
+    Every successful response increases the rate by `increase` up to max_rate, and every 429 (or 503) divides it by 2 down to min_rate.
+    The Retry-After and X-RateLimit-Remaining/X-RateLimit-Reset headers pause the bucket until the host accepts requests again.
+    """
+    def __init__(self, rate, max_rate=None, min_rate=None, increase=None):
+        super().__init__(rate)
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.min_rate = min_rate if min_rate is not None else self.max_rate / 20
+        self.increase = increase if increase is not None else self.max_rate / 100
+
+    def pause(self, seconds):
+        """Stops taking requests for some seconds. The requests already waiting are sent after the pause at the current rate."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.last_refill = max(self.last_refill, now + seconds)
+            self.tokens = min(self.tokens, 0)
+
+    def update(self, status_code, headers):
+        """Adapts the rate to a response of the host.
+
+        Args:
+            status_code (int): status code of the response.
+            headers (dict): headers of the response.
+        """
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        with self.lock:
+            if status_code in (429, 503):
+                self.rate = max(self.min_rate, self.rate / 2)
+            elif status_code < 400:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            self.capacity = max(1, self.rate)
+
+        wait = None
+        if status_code in (429, 503):
+            wait = _seconds(headers.get('retry-after'))
+        if headers.get('x-ratelimit-remaining', '').strip() == '0':
+            reset = _seconds(headers.get('x-ratelimit-reset'))
+            if reset is not None:
+                wait = max(wait or 0, reset)
+        if wait:
+            self.pause(wait)
+
+
+def _seconds(value):
+    """Converts the value of a Retry-After or X-RateLimit-Reset header (seconds, Unix time or HTTP date) to the seconds to wait."""
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    # some hosts send the time of the reset instead of the seconds until the reset
+    if seconds > 10 ** 9:
+        seconds -= time.time()
+    return max(0, seconds)
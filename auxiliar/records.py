@@ -0,0 +1,197 @@
+import sys
+
+
+# The papers kept in memory by the crawlers (data_per_year, the citations data and the caches of OpenAlex) are stored
+# with these records instead of dictionaries: the fields are in __slots__, the repeated strings (names, countries,
+# venues, years, IDs) are interned and the same institution or author is shared by all the papers that have it.
+# The records are read as the dictionaries of the data files (record['Title'], record.get('Citations S2')) and they are
+# only converted to dictionaries when they are written (see to_json).
+
+_MISSING = object()
+
+# canonical institutions and authors, shared by all the records of the process
+_institutions = {}
+_authors = {}
+
+
+def clear():
+    """Empties the tables of canonical institutions and authors. It is called at the end of each crawl, so the tables do not
+    grow across the crawlers of a pipeline or a benchmark (the records already created are not changed).
+    """
+    _institutions.clear()
+    _authors.clear()
+
+
+def intern(value):
+    """Interns a string (other values are returned as they are)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def to_json(obj):
+    """Converts a record to its dictionary. It is used as the default function of json.dump and json.dumps,
+    so the records are converted one by one while the file is written.
+    """
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class Record:
+    """Base of the records. FIELDS has the key of each field in the data files and the name of its slot."""
+    __slots__ = ()
+    FIELDS = ()
+
+    def __getitem__(self, key):
+        for field, slot in self.FIELDS:
+            if field == key:
+                value = getattr(self, slot)
+                if value is not _MISSING:
+                    return self._read(field, value)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return any(field == key and getattr(self, slot) is not _MISSING for field, slot in self.FIELDS)
+
+    def keys(self):
+        return [field for field, slot in self.FIELDS if getattr(self, slot) is not _MISSING]
+
+    def _read(self, field, value):
+        return value
+
+    def to_dict(self):
+        return {field: self._read(field, getattr(self, slot)) for field, slot in self.FIELDS if getattr(self, slot) is not _MISSING}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Institution(Record):
+    __slots__ = ('name', 'country')
+    FIELDS = (('Institution Name', 'name'), ('Country', 'country'))
+
+    def __init__(self, name, country):
+        self.name = intern(name)
+        self.country = intern(country)
+
+
+class Author(Record):
+    __slots__ = ('name', 'institutions')
+    FIELDS = (('Author', 'name'), ('Institutions', 'institutions'))
+
+    def __init__(self, name, institutions):
+        self.name = intern(name)
+        self.institutions = institutions
+
+
+class Paper(Record):
+    __slots__ = ('title', 'year', 'doi', 'openalex_link', 's2_paper_id', 'authors', 'referenced_works', 'citations',
+                 'abstract', 'tldr')
+    # the fields of the base data and of the extended data, in the order of the data files
+    FIELDS = (('Title', 'title'), ('Year', 'year'), ('DOI Number', 'doi'), ('OpenAlex Link', 'openalex_link'),
+              ('S2 Paper ID', 's2_paper_id'), ('Authors and Institutions', 'authors'),
+              ('OpenAlex Referenced Works', 'referenced_works'), ('Citations S2', 'citations'),
+              ('Abstract', 'abstract'), ('TLDR', 'tldr'))
+
+    def _read(self, field, value):
+        if field == 'Citations S2' and value is not None:
+            # the cited papers are stored as tuples (paperId, title)
+            return [{'paperId': paper_id, 'title': title} for paper_id, title in value]
+        return value
+
+
+class CitedWork(Record):
+    __slots__ = ('title', 'authors', 'venue', 'year')
+    FIELDS = (('Title', 'title'), ('Authors', 'authors'), ('Venue', 'venue'), ('Year', 'year'))
+
+
+def institution(data):
+    """Returns the canonical record of an institution dictionary (or the value itself if it is not an institution)."""
+    if isinstance(data, Institution) or not isinstance(data, dict) or data.keys() != {'Institution Name', 'Country'}:
+        return data
+    key = (data['Institution Name'], data['Country'])
+    record = _institutions.get(key)
+    if record is None:
+        record = _institutions.setdefault(key, Institution(*key))
+    return record
+
+
+def author(data):
+    """Returns the canonical record of an author dictionary (or the value itself if it is not an author)."""
+    if isinstance(data, Author) or not isinstance(data, dict) or data.keys() != {'Author', 'Institutions'}:
+        return data
+    institutions = data['Institutions']
+    if isinstance(institutions, (list, tuple)):
+        institutions = tuple(institution(inst) for inst in institutions)
+        if not all(inst is None or isinstance(inst, Institution) for inst in institutions):
+            return Author(data['Author'], institutions)
+    elif institutions is not None:
+        return data
+    # the institutions are canonical, so the same author with the same institutions has the same key
+    key = (data['Author'], None if institutions is None else tuple(map(id, institutions)))
+    record = _authors.get(key)
+    if record is None:
+        record = _authors.setdefault(key, Author(data['Author'], institutions))
+    return record
+
+
+def authors(data):
+    """Converts a list of author dictionaries to a tuple of records (None and other values are returned as they are)."""
+    if not isinstance(data, (list, tuple)):
+        return data
+    return tuple(author(a) for a in data)
+
+
+def _citations(data):
+    if not isinstance(data, (list, tuple)):
+        return data
+    if not all(isinstance(c, dict) and c.keys() == {'paperId', 'title'} for c in data):
+        return data
+    return tuple((intern(c['paperId']), intern(c['title'])) for c in data)
+
+
+def paper(data):
+    """Converts the dictionary of a paper (base or extended data) to a record. The dictionaries with other fields
+    are returned as they are, so no data is lost.
+    """
+    if isinstance(data, Paper) or not isinstance(data, dict):
+        return data
+    if not data.keys() <= {field for field, _ in Paper.FIELDS}:
+        return data
+    record = Paper.__new__(Paper)
+    for field, slot in Paper.FIELDS:
+        setattr(record, slot, data.get(field, _MISSING))
+    record.year = intern(record.year)
+    record.s2_paper_id = intern(record.s2_paper_id)
+    if record.authors is not _MISSING:
+        record.authors = authors(record.authors)
+    if isinstance(record.referenced_works, list):
+        record.referenced_works = tuple(intern(work) for work in record.referenced_works)
+    if record.citations is not _MISSING:
+        citations = _citations(record.citations)
+        if citations is record.citations and citations is not None:
+            return data
+        record.citations = citations
+    return record
+
+
+def papers(data):
+    """Converts a list of paper dictionaries to records."""
+    return [paper(p) for p in data]
+
+
+def cited_work(data):
+    """Converts the dictionary of a cited paper of the citations data to a record (or returns the value itself)."""
+    if isinstance(data, CitedWork) or not isinstance(data, dict) or data.keys() != {'Title', 'Authors', 'Venue', 'Year'}:
+        return data
+    record = CitedWork.__new__(CitedWork)
+    record.title = intern(data['Title'])
+    record.authors = authors(data['Authors'])
+    record.venue = intern(data['Venue'])
+    record.year = intern(data['Year'])
+    return record
@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+
+
+# maximum number of results kept in memory by default
+DEFAULT_MAX_SIZE = 100000
+
+
+class SingleFlight:
+    """Coalesces the concurrent lookups of the same resources: the first thread that asks for a key fetches it, the other
+    threads that ask for it in the meantime wait for that result instead of sending their own request. The results are
+    then kept in an in-memory LRU, so a resource shared by many papers (e.g. a cited work) costs one request per run.
+
+    The keys must be normalized by the caller (e.g. DOIs in lower case).
+    """
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        """
+        Args:
+            max_size (int, optional): maximum number of results kept in the LRU (0 to only coalesce the lookups in flight).
+        """
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.results = OrderedDict()
+        self.in_flight = {}
+
+    def get_many(self, keys, fetch_many):
+        """Returns the results of a list of keys. The keys that are not in the LRU or in flight are fetched together.
+
+        Args:
+            keys (list): the keys of the resources.
+            fetch_many (function): function that receives the list of keys to fetch and returns a dictionary with the result
+                of each key. The keys without result (e.g. not found or failed) are not stored in the LRU.
+
+        Returns:
+            dict: dictionary with the key as key and the result (None if there is no result) as value.
+        """
+        results, claimed, waiting = {}, [], {}
+        with self.lock:
+            for key in dict.fromkeys(keys):
+                if key in self.results:
+                    self.results.move_to_end(key)
+                    results[key] = self.results[key]
+                elif key in self.in_flight:
+                    waiting[key] = self.in_flight[key]
+                else:
+                    self.in_flight[key] = _Flight()
+                    claimed.append(key)
+
+        if claimed:
+            fetched = {}
+            try:
+                fetched = fetch_many(claimed)
+            finally:
+                # the waiting threads are released even if the fetch fails (they get None)
+                with self.lock:
+                    for key in claimed:
+                        flight = self.in_flight.pop(key)
+                        flight.result = fetched.get(key, None)
+                        if key in fetched and self.max_size > 0:
+                            self.results[key] = fetched[key]
+                            self.results.move_to_end(key)
+                        flight.done.set()
+                    while len(self.results) > self.max_size:
+                        self.results.popitem(last=False)
+            for key in claimed:
+                results[key] = fetched.get(key, None)
+
+        for key, flight in waiting.items():
+            flight.done.wait()
+            results[key] = flight.result
+        return results
+
+    def get(self, key, fetch):
+        """Returns the result of a key, see get_many.
+
+        Args:
+            key (string): the key of the resource.
+            fetch (function): function that receives the key and returns its result (None if there is no result).
+        """
+        def fetch_many(keys):
+            result = fetch(keys[0])
+            return {keys[0]: result} if result is not None else {}
+        return self.get_many([key], fetch_many)[key]
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
@@ -1,32 +1,124 @@
+import queue
+import logging
 import threading
 from tqdm import tqdm
+from auxiliar.metrics import metrics
 
 class Thread:
     def __init__(self, num_threads):
         self.num_threads = num_threads
 
-    def run(self, target, args):
-        first_year, last_year = args[1:3]
-        data = args[0]
+    def run(self, target, units):
+        """Runs the target function once for every unit of work. The units are placed in a shared queue and each
+        thread takes the next unit as soon as it finishes the previous one, until the queue is empty.
 
-        total_years = last_year - first_year + 1
-        average_chunk_size = total_years // self.num_threads
-        remainder = total_years % self.num_threads
-        start_year = first_year
+        Args:
+            target (function): function to run.
+            units (list): list of tuples with the arguments of each call to the target function.
+        """
+        work_queue = queue.Queue()
+        for unit in units:
+            work_queue.put(unit)
 
-        if self.num_threads == 1:
-            target(*args)
+        stage = target.__name__.strip('_')
+        progress = tqdm(total=len(units), desc=stage)
+        progress_lock = threading.Lock()
+
+        def worker():
+            while True:
+                try:
+                    unit = work_queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    target(*unit)
+                    metrics.record_items(stage)
+                except Exception:
+                    logging.exception(f"(THREAD) - Error processing the unit {unit}")
+                    metrics.record_items(stage, failed=True)
+                with progress_lock:
+                    progress.update(1)
+
+        num_threads = min(self.num_threads, len(units))
+        if num_threads <= 1:
+            worker()
         else:
             threads = []
-            for i in range(self.num_threads):
-                chunk_size = average_chunk_size
-                if i < remainder:
-                    chunk_size += 1
-                end_year = start_year + chunk_size - 1 
-                t = threading.Thread(target=target, args=(data, start_year, end_year))
+            for _ in range(num_threads):
+                t = threading.Thread(target=worker)
                 threads.append(t)
                 t.start()
-                start_year = end_year + 1
 
-            for t in tqdm(threads):
-                t.join()
\ No newline at end of file
+            for t in threads:
+                t.join()
+        progress.close()
+
+
+# maximum number of items waiting between two stages of a pipeline
+QUEUE_SIZE = 100
+_STOP = object()
+
+
+class Pipeline:
+    def __init__(self, stages, queue_size=QUEUE_SIZE):
+        """Runs the units of work through a list of stages. Each stage has its own threads and the stages are connected
+        by bounded queues, so a stage waits when the next one is not able to keep up (backpressure).
+
+        Args:
+            stages (list): list of tuples with the function and the number of threads of each stage. Each function receives
+                the arguments of an item and returns the list of items (tuples of arguments) for the next stage.
+                The function of the last stage does not return anything.
+            queue_size (int, optional): maximum number of items waiting in each queue. Defaults to QUEUE_SIZE.
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, units):
+        """Runs the pipeline until all the units and the items produced from them are processed.
+        If a function raises an exception, the error is logged and its item is discarded.
+
+        Args:
+            units (list): list of tuples with the arguments of each call to the function of the first stage.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # one progress bar for each stage, with the items processed by the stage
+        names = [target.__name__.strip('_') for target, _ in self.stages]
+        progress = [tqdm(desc=name, position=index) for index, name in enumerate(names)]
+        progress_lock = threading.Lock()
+
+        def worker(index):
+            target, _ = self.stages[index]
+            last = index == len(self.stages) - 1
+            while True:
+                item = queues[index].get()
+                if item is _STOP:
+                    return
+                try:
+                    results = target(*item)
+                    if not last:
+                        for result in results or []:
+                            queues[index + 1].put(result)
+                    metrics.record_items(names[index])
+                except Exception:
+                    logging.exception(f"(THREAD) - Error processing the item {item}")
+                    metrics.record_items(names[index], failed=True)
+                with progress_lock:
+                    progress[index].update(1)
+
+        stage_threads = []
+        for index, (_, num_threads) in enumerate(self.stages):
+            threads = [threading.Thread(target=worker, args=(index,)) for _ in range(max(1, num_threads))]
+            for t in threads:
+                t.start()
+            stage_threads.append(threads)
+
+        for unit in units:
+            queues[0].put(unit)
+        # when all the threads of a stage have finished, the next stage does not receive more items
+        for index, threads in enumerate(stage_threads):
+            for _ in threads:
+                queues[index].put(_STOP)
+            for t in threads:
+                t.join()
+        for bar in progress:
+            bar.close()
@@ -0,0 +1,349 @@
+import json
+import time
+import zlib
+import random
+import threading
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+from auxiliar import file
+from auxiliar.paper_index import normalize_title
+
+
+# hosts served by the mock server, the requests to http://{address}/{host}/... are answered as the host would
+MOCK_HOSTS = ('dblp.org', 'api.openalex.org', 'api.semanticscholar.org')
+
+
+class Corpus:
+    """Papers served by the mock server, with the fields of the extended data (see data/extended_crawler_data/extended_data_example.json)
+    and the identifiers used by the APIs. The DBLP pages and the OpenAlex and Semantic Scholar responses are built from them.
+
+    The papers are generated (synthetic titles, authors and institutions) or loaded from the extended data of a previous crawl.
+    The cited papers of the papers ("Citations S2") are also part of the corpus, so the citations crawler can request them.
+    """
+    def __init__(self, conference, seed=1):
+        self.conference = conference
+        self.random = random.Random(seed)
+        self.papers_per_year = {}
+        self.papers = {}
+        self.by_doi = {}
+        self.by_title = {}
+        self.institutions = {}
+
+    @classmethod
+    def generate(cls, conference, years, papers_per_year=100, citations_per_paper=20, authors_per_paper=4,
+                 abstract_size=1000, doi_rate=0.9, seed=1):
+        """Generates a synthetic corpus.
+
+        Args:
+            conference (string): the name of the conference.
+            years (tuple): first and last year.
+            papers_per_year (int, optional): number of papers of each year.
+            citations_per_paper (int, optional): number of cited papers of each paper.
+            authors_per_paper (int, optional): maximum number of authors of each paper.
+            abstract_size (int, optional): number of characters of the abstracts (the size of the Semantic Scholar responses).
+            doi_rate (float, optional): fraction of the papers with DOI in DBLP (the others are searched by title).
+            seed (int, optional): seed of the random generator.
+
+        Returns:
+            Corpus: the corpus.
+        """
+        corpus = cls(conference, seed)
+        rnd = corpus.random
+        words = ['learning', 'scalable', 'graph', 'neural', 'distributed', 'systems', 'efficient', 'analysis', 'software',
+                 'data', 'network', 'secure', 'cloud', 'model', 'towards', 'adaptive', 'query', 'storage', 'robust', 'fast']
+        institutions = [(f"I{100000 + i}", f"University {i}", rnd.choice(['US', 'ES', 'DE', 'CN', 'GB', 'FR'])) for i in range(200)]
+        authors = [(f"Author {i}", rnd.sample(institutions, rnd.randint(1, 2))) for i in range(5 * papers_per_year)]
+        cited_pool = [corpus._new_paper(f"C{i}", ' '.join(rnd.choices(words, k=6)).capitalize() + f" {i}", rnd.randint(1990, years[0]),
+                                        rnd.sample(authors, rnd.randint(1, authors_per_paper)), abstract_size, has_doi=rnd.random() < 0.8)
+                      for i in range(max(10, papers_per_year * citations_per_paper // 4))]
+
+        for year in range(years[0], years[1] + 1):
+            papers = []
+            for i in range(papers_per_year):
+                title = ' '.join(rnd.choices(words, k=7)).capitalize() + f" {year}-{i}"
+                paper = corpus._new_paper(f"P{year}{i}", title, year, rnd.sample(authors, rnd.randint(1, authors_per_paper)),
+                                          abstract_size, has_doi=True)
+                cited = rnd.sample(cited_pool, min(citations_per_paper, len(cited_pool)))
+                paper['Citations S2'] = [{'paperId': c['S2 Paper ID'], 'title': c['Title']} for c in cited]
+                paper['DBLP DOI'] = rnd.random() < doi_rate
+                papers.append(paper)
+            corpus.papers_per_year[str(year)] = papers
+        return corpus
+
+    @classmethod
+    def load(cls, conference, path, abstract_size=1000, seed=1):
+        """Loads the corpus from the extended data of a conference crawled before (the recorded data of the real APIs).
+
+        Args:
+            conference (string): the name of the conference.
+            path (string): path of the extended data (without extension, JSON or JSON Lines).
+            abstract_size (int, optional): number of characters of the abstracts of the papers without abstract.
+            seed (int, optional): seed of the random generator.
+
+        Returns:
+            Corpus: the corpus.
+        """
+        corpus = cls(conference, seed)
+        for year, papers in (file.load_data(path) or {}).items():
+            year_papers = []
+            for i, recorded in enumerate(papers):
+                authors = [(a['Author'], [(f"I{zlib.crc32(inst['Institution Name'].encode('utf-8'))}", inst['Institution Name'], inst['Country'])
+                                          for inst in a['Institutions'] or [] if inst is not None])
+                           for a in recorded.get('Authors and Institutions') or []]
+                paper = corpus._new_paper(recorded.get('S2 Paper ID') or f"P{year}{i}", recorded['Title'], recorded.get('Year') or year,
+                                          authors, abstract_size, has_doi=recorded.get('DOI Number') is not None)
+                if recorded.get('DOI Number'):
+                    del corpus.by_doi[paper['DOI Number'].lower()]
+                    paper['DOI Number'] = recorded['DOI Number']
+                    corpus.by_doi[paper['DOI Number'].lower()] = paper
+                paper['Abstract'] = recorded.get('Abstract') or paper['Abstract']
+                paper['TLDR'] = recorded.get('TLDR') or paper['TLDR']
+                citations = []
+                for c in recorded.get('Citations S2') or []:
+                    if c.get('paperId') is None:
+                        continue
+                    if c['paperId'] not in corpus.papers:
+                        corpus._new_paper(c['paperId'], c.get('title') or c['paperId'], None, [], abstract_size, has_doi=False)
+                    citations.append({'paperId': c['paperId'], 'title': c.get('title')})
+                paper['Citations S2'] = citations
+                paper['DBLP DOI'] = paper['DOI Number'] is not None
+                year_papers.append(paper)
+            corpus.papers_per_year[str(year)] = year_papers
+        return corpus
+
+    def _new_paper(self, paper_id, title, year, authors, abstract_size, has_doi):
+        number = len(self.papers)
+        paper = {'Title': title,
+                 'Year': str(year) if year is not None else None,
+                 'DOI Number': f"10.5555/bench.{number}" if has_doi else None,
+                 'OpenAlex ID': f"W{10 ** 9 + number}",
+                 'S2 Paper ID': paper_id,
+                 'Authors': authors,
+                 'Venue': self.conference.upper(),
+                 'Abstract': ''.join(self.random.choices('abcdefghij ', k=abstract_size)),
+                 'TLDR': f"TLDR of {title}",
+                 'Citations S2': []}
+        self.papers[paper_id] = paper
+        if has_doi:
+            self.by_doi[paper['DOI Number'].lower()] = paper
+        self.by_title[normalize_title(title)] = paper
+        for _, institutions in authors:
+            for inst_id, name, country in institutions:
+                self.institutions[inst_id] = (name, country)
+        return paper
+
+    def num_papers(self):
+        return sum(len(papers) for papers in self.papers_per_year.values())
+
+    # responses of the APIs
+
+    def dblp_conference_page(self):
+        links = ''.join(f'<li><a href="https://dblp.org/db/conf/{self.conference}/{self.conference}{year}.html">{year}</a></li>'
+                        for year in sorted(self.papers_per_year))
+        return f'<html><body><ul>{links}</ul></body></html>'
+
+    def dblp_year_xml(self, year):
+        records = []
+        for i, paper in enumerate(self.papers_per_year.get(year, [])):
+            authors = ''.join(f'<author>{escape(name)}</author>' for name, _ in paper['Authors'])
+            ee = f"<ee>https://doi.org/{escape(paper['DOI Number'])}</ee>" if paper['DBLP DOI'] else ''
+            records.append(f'<r><inproceedings key="conf/{self.conference}/Paper{year}{i}" mdate="2024-01-01">{authors}'
+                           f"<title>{escape(paper['Title'])}.</title><booktitle>{self.conference.upper()}</booktitle>"
+                           f'<year>{year}</year>{ee}<crossref>conf/{self.conference}/{year}</crossref>'
+                           f'<url>db/conf/{self.conference}/{self.conference}{year}.html#Paper{year}{i}</url></inproceedings></r>')
+        return (f'<?xml version="1.0" encoding="UTF-8"?><bht key="db/conf/{self.conference}/{self.conference}{year}.bht">'
+                f'<h1>{self.conference.upper()} {year}</h1><h2>Main Track</h2><dblpcites>{"".join(records)}</dblpcites></bht>')
+
+    def dblp_year_html(self, year):
+        entries = []
+        for paper in self.papers_per_year.get(year, []):
+            link = f"<li><a href=\"https://api.openalex.org/works/https://doi.org/{escape(paper['DOI Number'])}\">OpenAlex</a></li>" if paper['DBLP DOI'] else ''
+            authors = ''.join(f'<span itemprop="author">{escape(name)}</span>' for name, _ in paper['Authors'])
+            entries.append(f'<li class="entry inproceedings" itemscope itemtype="http://schema.org/ScholarlyArticle">'
+                           f'<nav class="publ"><ul>{link}<li><a href="https://dblp.org">dblp</a></li></ul></nav>'
+                           f'<cite class="data">{authors}<span class="title" itemprop="name">{escape(paper["Title"])}.</span>'
+                           f'<span itemprop="datePublished">{year}</span></cite></li>')
+        return f'<html><body><h2>Main Track</h2><ul class="publ-list">{"".join(entries)}</ul></body></html>'
+
+    def openalex_work(self, paper):
+        return {'id': f"https://openalex.org/{paper['OpenAlex ID']}",
+                'doi': f"https://doi.org/{paper['DOI Number']}",
+                'title': paper['Title'],
+                'publication_year': int(paper['Year']) if paper['Year'] else None,
+                'authorships': [{'author': {'display_name': name},
+                                 'institutions': [{'id': f"https://openalex.org/{inst_id}", 'display_name': inst_name, 'country_code': country}
+                                                  for inst_id, inst_name, country in institutions]}
+                                for name, institutions in paper['Authors']],
+                'referenced_works': [f"https://openalex.org/{self.papers[c['paperId']]['OpenAlex ID']}"
+                                     for c in paper['Citations S2'] if c['paperId'] in self.papers]}
+
+    def openalex_institution(self, inst_id):
+        name, country = self.institutions[inst_id]
+        return {'id': f"https://openalex.org/{inst_id}", 'display_name': name, 'country_code': country}
+
+    def s2_paper(self, paper, fields):
+        data = {'paperId': paper['S2 Paper ID'],
+                'externalIds': {'DOI': paper['DOI Number']} if paper['DOI Number'] else {},
+                'title': paper['Title'],
+                'year': int(paper['Year']) if paper['Year'] else None,
+                'venue': paper['Venue'],
+                'authors': [{'authorId': None, 'name': name} for name, _ in paper['Authors']],
+                'abstract': paper['Abstract'],
+                'tldr': {'model': 'tldr@v2.0.0', 'text': paper['TLDR']},
+                'references': paper['Citations S2']}
+        # only the fields requested (and the paperId) are returned, as the API does
+        requested = {field.split('.')[0] for field in fields.split(',')} | {'paperId'}
+        return {key: value for key, value in data.items() if key in requested}
+
+    def s2_lookup(self, paper_id):
+        if paper_id.startswith('DOI:'):
+            return self.by_doi.get(paper_id[4:].lower())
+        return self.papers.get(paper_id)
+
+
+class MockServer:
+    """Local HTTP server that answers the requests of the crawlers as DBLP, OpenAlex and Semantic Scholar would, using the
+    papers of a Corpus. It runs in its own thread, see http_client.configure_redirects to send the requests to it.
+
+    The conditions of the real APIs can be injected: the latency of the responses and the fraction of the requests
+    throttled with a 429 response (with a Retry-After header).
+    """
+    def __init__(self, corpus, latency=0.0, throttle_rate=0.0, retry_after=1, host='127.0.0.1', port=0, seed=1):
+        """
+        Args:
+            corpus (Corpus): the papers served.
+            latency (float, optional): mean latency of the responses in seconds (uniform between 0.5 and 1.5 times it).
+            throttle_rate (float, optional): fraction of the requests answered with a 429 response.
+            retry_after (int, optional): value of the Retry-After header of the 429 responses.
+            host (string, optional): address of the server.
+            port (int, optional): port of the server (0 to use a free port).
+            seed (int, optional): seed of the random generator of the injected conditions.
+        """
+        self.corpus = corpus
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def redirects(self):
+        """Returns the redirections for http_client.configure_redirects."""
+        return {host: f"{self.url}/{host}" for host in MOCK_HOSTS}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _record(self, host, status, num_bytes):
+        with self.lock:
+            stats = self.stats.setdefault(host, {'requests': 0, 'throttled': 0, 'bytes': 0})
+            stats['requests'] += 1
+            stats['throttled'] += status == 429
+            stats['bytes'] += num_bytes
+
+    def _delay_and_throttle(self):
+        with self.lock:
+            delay = self.latency * self.random.uniform(0.5, 1.5) if self.latency > 0 else 0
+            throttled = self.random.random() < self.throttle_rate
+        if delay:
+            time.sleep(delay)
+        return throttled
+
+    def respond(self, method, host, path, query, body):
+        """Builds the response of a request.
+
+        Returns:
+            tuple: the status code, the content type and the content of the response.
+        """
+        corpus = self.corpus
+        if host == 'dblp.org':
+            prefix = f"/db/conf/{corpus.conference}/"
+            if path == prefix:
+                return 200, 'text/html', corpus.dblp_conference_page()
+            name = path[len(prefix):] if path.startswith(prefix) else ''
+            year = name[len(corpus.conference):len(corpus.conference) + 4]
+            if year in corpus.papers_per_year and name.endswith('.xml'):
+                return 200, 'application/xml', corpus.dblp_year_xml(year)
+            if year in corpus.papers_per_year and name.endswith('.html'):
+                return 200, 'text/html', corpus.dblp_year_html(year)
+
+        elif host == 'api.openalex.org':
+            if path.startswith('/works/https://doi.org/'):
+                paper = corpus.by_doi.get(path[len('/works/https://doi.org/'):].lower())
+                if paper is not None:
+                    return 200, 'application/json', corpus.openalex_work(paper)
+            elif path == '/works' and query.get('filter', '').startswith('doi:'):
+                papers = [corpus.by_doi.get(doi.lower()) for doi in query['filter'][4:].split('|')]
+                return 200, 'application/json', {'results': [corpus.openalex_work(p) for p in papers if p is not None]}
+            elif path == '/institutions' and query.get('filter', '').startswith('openalex_id:'):
+                ids = [i for i in query['filter'][len('openalex_id:'):].split('|') if i in corpus.institutions]
+                return 200, 'application/json', {'results': [corpus.openalex_institution(i) for i in ids]}
+
+        elif host == 'api.semanticscholar.org':
+            fields = query.get('fields', 'title')
+            if method == 'POST' and path == '/graph/v1/paper/batch':
+                papers = [corpus.s2_lookup(paper_id) for paper_id in (body or {}).get('ids', [])]
+                return 200, 'application/json', [corpus.s2_paper(p, fields) if p is not None else None for p in papers]
+            if path == '/graph/v1/paper/search/match':
+                paper = corpus.by_title.get(normalize_title(query.get('query', '')))
+                if paper is not None:
+                    return 200, 'application/json', {'data': [{**corpus.s2_paper(paper, fields), 'matchScore': 100.0}]}
+                return 404, 'application/json', {'error': 'Title match not found'}
+
+        return 404, 'application/json', {'error': 'Not found'}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _serve(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                parsed = urlparse(self.path)
+                # the path is /{host}/{path of the real request}
+                host, _, path = parsed.path.lstrip('/').partition('/')
+                query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+
+                if server._delay_and_throttle():
+                    status, content_type, content = 429, 'application/json', {'message': 'Too Many Requests'}
+                else:
+                    status, content_type, content = server.respond(method, host, unquote('/' + path), query, body)
+                content = (content if isinstance(content, str) else json.dumps(content)).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                if status == 429:
+                    self.send_header('Retry-After', str(server.retry_after))
+                self.end_headers()
+                self.wfile.write(content)
+                server._record(host, status, len(content))
+
+            def do_GET(self):
+                self._serve('GET')
+
+            def do_POST(self):
+                self._serve('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from auxiliar import file, http_client, jsonl
+from auxiliar.metrics import metrics
+from benchmark.mock_server import Corpus, MockServer, MOCK_HOSTS
+
+
+DEFAULT_CONFERENCE = 'bench'
+DEFAULT_RATE = 1000
+
+
+def _serve(options, conn):
+    """Runs the mock server in its own process, so its CPU time and memory are not part of the measures of the crawlers."""
+    if options['corpus'] is not None:
+        corpus = Corpus.load(options['conference'], options['corpus'], abstract_size=options['abstract_size'], seed=options['seed'])
+    else:
+        corpus = Corpus.generate(options['conference'], options['years'], papers_per_year=options['papers'],
+                                 citations_per_paper=options['citations'], authors_per_paper=options['authors'],
+                                 abstract_size=options['abstract_size'], doi_rate=options['doi_rate'], seed=options['seed'])
+    server = MockServer(corpus, latency=options['latency'], throttle_rate=options['throttle'],
+                        retry_after=options['retry_after'], seed=options['seed']).start()
+    conn.send((server.url, corpus.num_papers()))
+    conn.recv()
+    server.stop()
+    conn.send(server.stats)
+
+
+def _count_papers(path, citations=False):
+    if citations:
+        # the citations data is a dictionary (JSON) or one record per citing paper (JSON Lines), not data by year
+        jsonl_path = jsonl.find_jsonl(path)
+        if jsonl_path is not None:
+            return sum(len(record['Cited Papers'] or []) for record in jsonl.iter_jsonl(jsonl_path))
+        return sum(len(cited or []) for cited in (file.load_json(path) or {}).values())
+    return sum(len(papers) for papers in (file.load_data(path) or {}).values())
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KB in Linux (and in bytes in macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _measure(name, crawl, count):
+    """Runs a crawler and returns its measures.
+
+    Args:
+        name (string): the name of the crawler.
+        crawl (function): function that runs the crawler.
+        count (function): function that returns the number of papers obtained by the crawler.
+
+    Returns:
+        dict: the measures of the crawler.
+    """
+    metrics.reset()
+    start, start_cpu = time.perf_counter(), time.process_time()
+    crawl()
+    seconds = time.perf_counter() - start
+    cpu_seconds = time.process_time() - start_cpu
+
+    data = metrics.to_dict()
+    num_papers = count()
+    num_requests = sum(host['requests'] for host in data['hosts'].values())
+    return {'crawler': name,
+            'seconds': round(seconds, 3),
+            'papers': num_papers,
+            'papers_per_second': round(num_papers / seconds, 2) if seconds > 0 else None,
+            'requests': num_requests,
+            'requests_per_second': round(num_requests / seconds, 2) if seconds > 0 else None,
+            'throttled': sum(host['throttled'] for host in data['hosts'].values()),
+            'retries': sum(host['retries'] for host in data['hosts'].values()),
+            'cpu_seconds': round(cpu_seconds, 3),
+            'parse_cpu_seconds': round(sum(timer['sum'] for timer in data['timers'].values()), 3),
+            'peak_rss_mb': _peak_rss_mb(),
+            'metrics': data}
+
+
+def run(args):
+    """Runs the crawlers against the mock server in a temporary working directory and returns the report."""
+    from crawler import base_crawler, extended_crawler, citations_crawler, pipeline_crawler
+
+    first_year, last_year = args.y
+    conf = args.c
+    options = {'conference': conf, 'years': (first_year, last_year), 'corpus': args.corpus, 'papers': args.papers,
+               'citations': args.citations, 'authors': args.authors, 'abstract_size': args.abstract_size,
+               'doi_rate': args.doi_rate, 'latency': args.latency / 1000, 'throttle': args.throttle,
+               'retry_after': args.retry_after, 'seed': args.seed}
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(options, child_conn), daemon=True)
+    server.start()
+    server_url, corpus_papers = conn.recv()
+
+    # the requests are sent to the mock server, with the rates of the real APIs or without limits
+    if not args.real_limits:
+        http_client.HOST_RATE_TIERS = {host: {'key': (args.rate, args.rate), 'no_key': (args.rate, args.rate)} for host in MOCK_HOSTS}
+    http_client.configure_redirects({host: f"{server_url}/{host}" for host in MOCK_HOSTS})
+    http_client.configure_credentials(s2_api_key='benchmark', openalex_email='benchmark@example.com')
+    http_client.configure_engine(args.engine)
+    http_client.configure_pool(args.t)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='crawler_benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    initial_dir = os.getcwd()
+    os.chdir(workdir)
+    logging.basicConfig(filename='./benchmark.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    years = (first_year, last_year)
+    output = {'output_format': args.format}
+    results = []
+    try:
+        if args.pipeline:
+            pipeline = pipeline_crawler.PipelineCrawler([conf], years, args.t, './data', parser=args.parser, **output)
+            results.append(_measure('pipeline', pipeline.crawl,
+                                    lambda: _count_papers(f"./data/extended_crawler_data/{conf}_extended_data")))
+        else:
+            base = base_crawler.BaseCrawler([conf], years, args.t, './data/base_crawler_data', parser=args.parser, **output)
+            results.append(_measure('base', base.crawl, lambda: _count_papers(f"./data/base_crawler_data/{conf}_basic_data")))
+            extended = extended_crawler.ExtendedCrawler([conf], years, args.t, './data/extended_crawler_data', **output)
+            results.append(_measure('extended', extended.crawl,
+                                    lambda: _count_papers(f"./data/extended_crawler_data/{conf}_extended_data")))
+            citations = citations_crawler.CitationsCrawler([conf], years, args.t, './data/citations_crawler_data', **output)
+            results.append(_measure('citations', citations.crawl,
+                                    lambda: _count_papers(f"./data/citations_crawler_data/{conf}_citations_data", citations=True)))
+    finally:
+        http_client.close()
+        http_client.configure_redirects(None)
+        conn.send('stop')
+        server_stats = conn.recv()
+        server.join()
+        os.chdir(initial_dir)
+
+    return {'options': {key: value for key, value in vars(args).items() if key != 'output'},
+            'corpus_papers': corpus_papers, 'workdir': workdir, 'server': server_stats, 'results': results}
+
+
+def print_report(report):
+    columns = ['crawler', 'seconds', 'papers', 'papers_per_second', 'requests', 'requests_per_second',
+               'throttled', 'retries', 'cpu_seconds', 'parse_cpu_seconds', 'peak_rss_mb']
+    rows = [[str(result[column]) for column in columns] for result in report['results']]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print(' '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print(' '.join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the crawlers against a local mock of DBLP, OpenAlex and Semantic Scholar and reports their performance')
+    parser.add_argument('--c', type=str, default=DEFAULT_CONFERENCE, help='Name of the conference of the mock corpus')
+    parser.add_argument('--y', type=int, nargs=2, default=[2021, 2022], help='First and last year of the mock corpus')
+    parser.add_argument('--t', type=int, default=8, help='Number of threads of the crawlers')
+    parser.add_argument('--engine', type=str, choices=['threads', 'async'], default='threads', help='Engine used to send the HTTP requests')
+    parser.add_argument('--parser', type=str, choices=['xml', 'html'], default='xml', help='Parser used for the DBLP pages')
+    parser.add_argument('--format', type=str, choices=['json', 'jsonl'], default='json', help='Format of the output files')
+    parser.add_argument('--pipeline', nargs='?', const='default_value', help='Flag to indicate if we want to run the three crawlers as one pipeline')
+    parser.add_argument('--corpus', type=str, help='Path of the extended data of a crawled conference to serve (by default a synthetic corpus is generated)')
+    parser.add_argument('--papers', type=int, default=100, help='Papers per year of the synthetic corpus')
+    parser.add_argument('--citations', type=int, default=20, help='Cited papers of each paper of the synthetic corpus')
+    parser.add_argument('--authors', type=int, default=4, help='Maximum number of authors of each paper of the synthetic corpus')
+    parser.add_argument('--abstract_size', type=int, default=1000, help='Characters of the abstracts (size of the Semantic Scholar responses)')
+    parser.add_argument('--doi_rate', type=float, default=0.9, help='Fraction of the papers with DOI in DBLP (the others are searched by title)')
+    parser.add_argument('--latency', type=float, default=20, help='Mean latency of the responses of the mock server in milliseconds')
+    parser.add_argument('--throttle', type=float, default=0.0, help='Fraction of the requests answered with a 429 response')
+    parser.add_argument('--retry_after', type=int, default=1, help='Retry-After header (seconds) of the 429 responses')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='Requests per second allowed to each host (ignored with --real_limits)')
+    parser.add_argument('--real_limits', nargs='?', const='default_value', help='Flag to indicate if we want to use the rate limits of the real APIs')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the synthetic corpus and of the injected 429 responses')
+    parser.add_argument('--workdir', type=str, help='Directory where the crawlers write their data (a temporary directory by default)')
+    parser.add_argument('--output', type=str, help='Path of a JSON file to save the report')
+    args = parser.parse_args()
+
+    if args.y[0] > args.y[1]:
+        sys.exit("Error: The first value of --y must be lower than the second value")
+    if args.t < 1:
+        sys.exit("Error: The --t argument must be greater than 0")
+    if not 0 <= args.throttle < 1:
+        sys.exit("Error: The --throttle argument must be between 0 and 1")
+    if args.corpus and not file.exists_data(args.corpus):
+        sys.exit(f"Error: The corpus {args.corpus} does not exist")
+
+    output = os.path.abspath(args.output) if args.output else None
+    report = run(args)
+    print_report(report)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        print(f"Report saved in {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,16 @@ from dotenv import load_dotenv
 from crawler import base_crawler
 from crawler import extended_crawler
 from crawler import citations_crawler
+from crawler import pipeline_crawler
 from auxiliar import file
+from auxiliar import http_client
+from auxiliar import export
+from auxiliar.metrics import metrics, DEFAULT_METRICS_PATH
+
+
+def _sibling_dir(output_dir, name):
+    """Returns the directory of the data of another crawler in the layout of the pipeline (all the crawlers in the same directory)."""
+    return os.path.join(os.path.dirname(os.path.normpath(output_dir)), name)
 
 
 def process():
@@ -19,8 +28,25 @@ def process():
     parser.add_argument('--t', type=int, nargs='?', const='default_value', help='To change the number of threads used in the crawler')
     parser.add_argument('--no_key', nargs='?', const='default_value', help='Flag to indicate if we want to use the crawler without a Semantic Scholar API key')
     parser.add_argument('--citations', nargs='?', const='default_value', help='Flag to indicate if we want to use the citations crawler')
+    parser.add_argument('--pipeline', nargs='?', const='default_value', help='Flag to indicate if we want to run the base, extended and citations crawlers together, passing the papers from one to the next as soon as they are ready')
+    parser.add_argument('--export', nargs='?', const='default_value', help='Flag to indicate if we want to export the crawled data to Parquet tables')
     parser.add_argument('--o', type=str, nargs='?', const='default_value', help='Output directory for the data')
+    parser.add_argument('--i', type=str, help='(Extended and Citations Crawlers, Export) Input directory, with the data of the previous crawler or, for the export, the directory with the data of all the crawlers (by default, the directory next to the output directory)')
     parser.add_argument('--filter', type=str, nargs='+', help='(Base Crawler) Filter to apply to the papers, if we want to filter the sections (e.g. poster/demos/keynotes/etc.)')
+    parser.add_argument('--no_cache', nargs='?', const='default_value', help='Flag to indicate if we want to disable the on-disk HTTP response cache')
+    parser.add_argument('--offline', nargs='?', const='default_value', help='Flag to indicate if we want to use only the cached responses (no request is sent)')
+    parser.add_argument('--cache_path', type=str, help='Path of the HTTP response cache file')
+    parser.add_argument('--cache_size', type=int, help='Maximum size of the HTTP response cache in MB')
+    parser.add_argument('--parser', type=str, choices=['xml', 'html'], default='xml', help='(Base Crawler) Parser used for the DBLP pages, the XML export (default) or the HTML page')
+    parser.add_argument('--dblp_dump', type=str, help='(Base Crawler) Path of the DBLP dump (dblp.xml.gz) to read the papers from instead of the DBLP website')
+    parser.add_argument('--incremental', nargs='?', const='default_value', help='Flag to indicate if we want to skip the years already crawled and resume an interrupted crawl')
+    parser.add_argument('--format', type=str, choices=['json', 'jsonl'], default='json', help='Format of the output files, JSON (written at the end) or JSON Lines (written while crawling)')
+    parser.add_argument('--compression', type=str, choices=['gzip', 'zstd'], help='Compression of the JSON Lines output files')
+    parser.add_argument('--nested', nargs='?', const='default_value', help='Flag to indicate if we want to export the JSON Lines output files to the JSON layout at the end')
+    parser.add_argument('--snapshot', type=str, help='(Extended Crawler) Path of a Semantic Scholar or OpenAlex snapshot (JSON Lines) used to resolve the papers without DOI by title locally')
+    parser.add_argument('--metrics', type=str, help='Path of the metrics JSON file written at the end of the crawl (./log/metrics.json by default)')
+    parser.add_argument('--prometheus', type=str, help='Path of a file to also write the metrics in the Prometheus text format')
+    parser.add_argument('--engine', type=str, choices=['threads', 'async'], default='threads', help='Engine used to send the HTTP requests (threads or async)')
 
     args = parser.parse_args()
 
@@ -47,9 +73,10 @@ def process():
     # --no_key argument
     if args.no_key:
         api_key = None
-        num_threads = 1
     else:
         api_key = file.api_key_in_env()
+    # the requests per second of each API depend on the credentials, all the threads share the same limits
+    http_client.configure_credentials(s2_api_key=api_key, openalex_email=file.openalex_email_in_env())
 
     # --filter argument
     if args.filter:
@@ -59,27 +86,89 @@ def process():
         # use the default filter implemented in the base crawler
         filter = None
 
+    # --no_cache, --offline, --cache_path and --cache_size arguments
+    if args.no_cache and args.offline:
+        sys.exit("Error: The --offline flag needs the HTTP response cache, it can not be used with --no_cache")
+    if args.cache_size is not None and args.cache_size < 1:
+        sys.exit("Error: The --cache_size argument must be greater than 0")
+    if not args.no_cache:
+        cache_path = args.cache_path if args.cache_path else http_client.DEFAULT_CACHE_PATH
+        cache_size = args.cache_size * 1024 ** 2 if args.cache_size else http_client.DEFAULT_MAX_SIZE
+        http_client.configure_cache(cache_path, max_size=cache_size, offline=bool(args.offline))
+
+    # --dblp_dump argument
+    if args.dblp_dump and not os.path.exists(args.dblp_dump):
+        sys.exit(f"Error: The DBLP dump {args.dblp_dump} does not exist")
+
+    # --format, --compression and --nested arguments
+    if args.format != 'jsonl' and (args.compression or args.nested):
+        sys.exit("Error: The --compression and --nested arguments can only be used with --format jsonl")
+    output_options = {'output_format': args.format, 'compression': args.compression, 'nested': bool(args.nested)}
+
+    # --pipeline argument
+    if args.pipeline and args.dblp_dump:
+        sys.exit("Error: The --dblp_dump argument can not be used with --pipeline, run the base crawler first")
+
+    # --snapshot argument
+    if args.snapshot and not os.path.exists(args.snapshot):
+        sys.exit(f"Error: The snapshot {args.snapshot} does not exist")
+
+    # --engine argument
+    http_client.configure_engine(args.engine)
+    http_client.configure_pool(num_threads)
+
     # crawler selection
-    if args.extended:
+    if args.pipeline:
+        if api_key is None and not args.no_key:
+            sys.exit("Error: You must provide a Semantic Scholar API key to use the pipeline or use the --no_key flag to use the crawler without an API key")
+        if args.o:
+            output_dir = args.o
+        else:
+            output_dir = './data'
+        pipeline = pipeline_crawler.PipelineCrawler(args.c, args.y, num_threads=num_threads, output_dir=output_dir, filter=filter, parser=args.parser, incremental=bool(args.incremental), snapshot=args.snapshot, **output_options)
+        pipeline.crawl()
+    elif args.extended:
         if api_key is None and not args.no_key:
             sys.exit("Error: You must provide a Semantic Scholar API key to use the extended crawler or use the --no_key flag to use the crawler without an API key")
         if args.o:
             output_dir = args.o
         else:
             output_dir = './data/extended_crawler_data/'
-        extended = extended_crawler.ExtendedCrawler(args.c, args.y, num_threads=num_threads, output_dir=output_dir)
+        input_dir = args.i if args.i else _sibling_dir(output_dir, 'base_crawler_data')
+        extended = extended_crawler.ExtendedCrawler(args.c, args.y, num_threads=num_threads, output_dir=output_dir, incremental=bool(args.incremental), snapshot=args.snapshot, base_dir=input_dir, **output_options)
         extended.crawl()
+    elif args.export:
+        if args.o:
+            output_dir = args.o
+        else:
+            output_dir = './data/parquet/'
+        # the data of the crawlers is read from the directory given with --i or, by default, the one of the output directory
+        data_dir = args.i if args.i else os.path.dirname(os.path.normpath(output_dir))
+        exporter = export.ParquetExporter(args.c, args.y, output_dir=output_dir, base_dir=os.path.join(data_dir, 'base_crawler_data'),
+                                          extended_dir=os.path.join(data_dir, 'extended_crawler_data'),
+                                          citations_dir=os.path.join(data_dir, 'citations_crawler_data'))
+        exporter.export()
     elif args.citations:
         if args.o:
             output_dir = args.o
         else:
             output_dir = './data/citations_crawler_data/'
-        citations = citations_crawler.CitationsCrawler(args.c, args.y, num_threads=num_threads, output_dir=output_dir)
+        input_dir = args.i if args.i else _sibling_dir(output_dir, 'extended_crawler_data')
+        citations = citations_crawler.CitationsCrawler(args.c, args.y, num_threads=num_threads, output_dir=output_dir, incremental=bool(args.incremental), extended_dir=input_dir, **output_options)
         citations.crawl()
     else:
         if args.o:
             output_dir = args.o
         else:
             output_dir = './data/base_crawler_data/'
-        base = base_crawler.BaseCrawler(args.c, args.y, num_threads=num_threads, output_dir=output_dir, filter=filter)
-        base.crawl()
\ No newline at end of file
+        base = base_crawler.BaseCrawler(args.c, args.y, num_threads=num_threads, output_dir=output_dir, filter=filter, parser=args.parser, dblp_dump=args.dblp_dump, incremental=bool(args.incremental), **output_options)
+        base.crawl()
+
+    http_client.close()
+
+    # --metrics and --prometheus arguments
+    metrics_path = args.metrics if args.metrics else DEFAULT_METRICS_PATH
+    metrics.write_json(metrics_path)
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+    print(f"Metrics saved in {metrics_path}")
\ No newline at end of file
@@ -1,92 +1,453 @@
+import io
+import os
 import time
 import threading
-from auxiliar import file, thread
+from auxiliar import file, thread, http_client, jsonl, records
+from auxiliar.institutions import get_institution_table
+from auxiliar.metrics import metrics
+from auxiliar.single_flight import SingleFlight
+from crawler import dblp_xml
 from bs4 import BeautifulSoup
-import requests
+from lxml import etree
 import re
 import logging
 
 data_per_year = {}
 
+DBLP_LINKS_PATH = './data/cache/dblp_links'
+# time (in seconds) after which the links of the year pages of a conference are searched again
+DBLP_LINKS_TTL = 24 * 3600
+# OpenAlex data of the works already requested in this execution (by DOI), shared by all the threads
+openalex_works = SingleFlight()
+
 
 class BaseCrawler:
-    def __init__(self, conferences, years, num_threads, output_dir, filter=None):
+    def __init__(self, conferences, years, num_threads, output_dir, filter=None, parser='xml', dblp_dump=None, incremental=False,
+                 output_format='json', compression=None, nested=False):
         self.conferences = conferences
         self.years = years
         self.num_threads = num_threads
         self.output_dir = output_dir
         self.filter = filter
+        self.parser = parser
+        self.dblp_dump = dblp_dump
+        self.incremental = incremental
+        self.output_format = output_format
+        self.compression = compression
+        self.nested = nested
+        self.writers = {}
         self.semaphore = threading.Semaphore(1)
     
     def crawl(self):
         initial_time = time.time()
         first_year, last_year = self.years
+        global data_per_year
+        data_per_year = {}
+
+        completed = {}
         for conf in self.conferences:
-            print(f"(BASE) - Searching {conf} from {first_year} to {last_year}...")
-            global data_per_year
-            data_per_year = {}
-                
+            data_per_year[conf], completed[conf] = self._resume(conf, 'basic_data')
+
+        if self.dblp_dump is not None:
+            # every paper found in the dump is a unit of work (only its OpenAlex data is requested). The papers are saved
+            # by the last stage in the order of the dump, so the order does not depend on the threads
+            print(f"(BASE) - Reading {', '.join(self.conferences)} from {first_year} to {last_year} in the DBLP dump {self.dblp_dump}...")
+            records_to_search = [(conf, record) for conf, record in self._get_dump_records(first_year, last_year)
+                                 if record['Key'] not in completed[conf]
+                                 and self._paper_unit(record['Year'], record['Title']) not in completed[conf]]
+            self.next_position = 0
+            self.pending_records = {}
+            pipeline = thread.Pipeline([(self._search_record, self.num_threads), (self._collect_record, 1)])
+            pipeline.run([(conf, position, record) for position, (conf, record) in enumerate(records_to_search)])
+        else:
+            # every year page of every conference is a unit of work, all the conferences are crawled at the same time
+            units = []
+            for conf in self.conferences:
+                print(f"(BASE) - Searching {conf} from {first_year} to {last_year}...")
+                for link in self._get_year_links(conf, first_year, last_year):
+                    if file.year_exists_in_file(self._get_link_year(conf, link), completed[conf]):
+                        continue
+                    units.append((conf, link))
             threads = thread.Thread(self.num_threads)
-            threads.run(self._search, (conf, first_year, last_year))
-            
-            file.save_json(f"{self.output_dir}/{conf}_basic_data", data_per_year)
+            threads.run(self._search, units)
+
+        for conf in self.conferences:
+            self._finish(conf, 'basic_data', data_per_year[conf])
 
+        get_institution_table().save()
+        records.clear()
         final_time = time.time()
         minutes = (final_time - initial_time) / 60
         print(f"(BASE) - Done in {minutes:.3f} minutes")
 
 
-    def _search(self, conf, first_year, last_year):
-        """Retrieve all initial information of a conference and save it into a JSON file.
+    def _get_year_links(self, conf, first_year, last_year):
+        """Get the links of the year pages of a conference that are in the range of years.
 
         Args:
             conf (string): The name of the conference from which we want to search for information.
             first_year (int): The first year from which we want to search for information.
             last_year (int): The last year from which we want to search for information.
+
+        Returns:
+            list: list with the links of the year pages.
+        """
+        year_links = self._get_year_link_map(conf)
+        return [link for year in range(first_year, last_year + 1) for link in year_links.get(str(year), [])]
+
+
+    def _get_year_link_map(self, conf):
+        """Get the links of the year pages of a conference grouped by year. The map is searched once per conference
+        and stored on disk for DBLP_LINKS_TTL seconds.
+
+        Args:
+            conf (string): The name of the conference from which we want to search for information.
+
+        Returns:
+            dict: dictionary with the year (string) as key and the list of links of that year as value.
+        """
+        all_year_links = file.load_json(DBLP_LINKS_PATH) or {}
+        entry = all_year_links.get(conf, None)
+        if entry is not None and time.time() - entry['Timestamp'] < DBLP_LINKS_TTL:
+            return entry['Years']
+
+        year_links = {}
+        for link in self._get_links(conf, max_age=DBLP_LINKS_TTL):
+            year = self._get_link_year(conf, link)
+            if year is not None:
+                year_links.setdefault(year, []).append(link)
+        for year in year_links:
+            year_links[year].sort()
+
+        # an empty map is not stored, it is probably a failed request
+        if year_links:
+            all_year_links[conf] = {'Timestamp': time.time(), 'Years': year_links}
+            os.makedirs(os.path.dirname(DBLP_LINKS_PATH), exist_ok=True)
+            file.save_json(DBLP_LINKS_PATH, all_year_links)
+        return year_links
+
+
+    def _search(self, conf, link):
+        """Retrieve all initial information of the papers of a year page of a conference. The XML export of the page is used
+        unless the HTML parser is selected or the XML is not available.
+
+        Args:
+            conf (string): The name of the conference from which we want to search for information.
+            link (string): The link of the year page of the conference.
+
+        Returns:
+            dict: the papers of the year page (by year).
         """    
+        publications = None
+        if self.parser == 'xml':
+            publications = self._get_xml_publications(link)
+        if publications is None:
+            publications = self._get_html_publications(link)
+
+        papers = {}
+        for pub_data in publications:
+            if pub_data is not None:
+                papers.setdefault(pub_data['Year'], []).append(pub_data)
+        self._commit(conf, 'basic_data', data_per_year[conf], self._get_link_year(conf, link), papers)
+        return papers
+
+
+
+    def _search_record(self, conf, position, record):
+        """Retrieve all initial information of a paper found in the DBLP dump.
+
+        Args:
+            conf (string): The name of the conference of the paper.
+            position (int): the position of the paper in the dump (among the papers to search).
+            record (dict): the paper data obtained with dblp_xml.iter_dump.
+
+        Returns:
+            list: the paper for the last stage (with failed set to True if its data could not be obtained).
+        """
+        try:
+            return [(conf, position, record, self._get_dblp_record_data(record), False)]
+        except Exception:
+            # the paper is still sent to the last stage, so the papers after it are not kept waiting
+            logging.exception(f"(BASE) - Error processing the paper {record['Key']} of the DBLP dump")
+            return [(conf, position, record, None, True)]
+
+
+
+    def _collect_record(self, conf, position, record, pub_data, failed):
+        """Last stage (one thread): saves the papers of the dump in the order of the dump. A paper waits until all the
+        papers before it are saved. The failed papers are not saved, so they are searched again in the next execution.
+        """
+        self.pending_records[position] = (conf, record, pub_data, failed)
+        while self.next_position in self.pending_records:
+            conf, record, pub_data, failed = self.pending_records.pop(self.next_position)
+            self.next_position += 1
+            if not failed:
+                papers = {pub_data['Year']: [pub_data]} if pub_data is not None else {}
+                self._commit(conf, 'basic_data', data_per_year[conf], record['Key'], papers)
+
+
 
-        links = self._get_links(conf)
-        valid_links = []
-        for link in links:
-            if self._filter_dblp_links(conf, link) and any(str(year) in link for year in range(first_year, last_year + 1)):
-                valid_links.append(link)
-
-        for link in valid_links:
-            pub_list_raw = self._get_pub_list(link)
-            for pub in pub_list_raw:
-                article_items = pub.find_all('li', {'itemtype': 'http://schema.org/ScholarlyArticle'})
-                header_h2 = pub.find_previous('h2')
-                header_h3 = pub.find_previous('h3')
-                if self._filter_section(header_h2, header_h3):
+    def _checkpoint_path(self, conf, name):
+        return f"{self.output_dir}/checkpoints/{conf}_{name}"
+
+
+
+    def _paper_unit(self, year, title):
+        """Identifier of a paper of the DBLP dump rebuilt from the output file (the records do not have the key of the dump)."""
+        return f"{year}:{title}"
+
+
+
+    def _saved_units(self, year_papers):
+        """Returns the units of work completed in an output file (from its papers by year): its years or, when the units
+        are the papers of the DBLP dump, its papers.
+        """
+        if self.dblp_dump is not None:
+            return {self._paper_unit(year, paper['Title']) for year, papers in year_papers for paper in papers}
+        return {str(year) for year, _ in year_papers}
+
+
+
+    def _resume(self, conf, name):
+        """Loads the data already obtained for a conference, so the completed units of work are not repeated. 
+        It is only done in incremental mode: the years (or the papers, with the DBLP dump) of the output file and the
+        units of the checkpoint file are completed.
+
+        Args:
+            conf (string): The name of the conference.
+            name (string): The name of the data (basic_data, extended_data).
+
+        Returns:
+            tuple: the data obtained (by year) and the set of completed units (years or paper keys).
+        """
+        checkpoint = self._checkpoint_path(conf, name)
+        if self.output_format == 'jsonl':
+            return self._resume_jsonl(conf, name, checkpoint)
+        if not self.incremental:
+            file.remove_checkpoint(checkpoint)
+            return {}, set()
+
+        conf_data = file.load_json(f"{self.output_dir}/{conf}_{name}") or {}
+        saved = self._saved_units(conf_data.items())
+        completed = set(saved)
+        for entry in file.load_checkpoint(checkpoint):
+            completed.add(entry['Unit'])
+            for year, year_papers in entry['Data'].items():
+                # the years (or papers) already in the output file are not added twice
+                if self.dblp_dump is not None:
+                    year_papers = [paper for paper in year_papers if self._paper_unit(year, paper['Title']) not in saved]
+                elif file.year_exists_in_file(year, saved):
                     continue
-                for child in article_items:
-                    pub_data = self._get_dblp_paper_data(child)
-                    if pub_data is None:
-                        continue
-                    if pub_data['Year'] not in data_per_year:
-                        self.semaphore.acquire()
-                        data_per_year[pub_data['Year']] = []
-                        self.semaphore.release()
-                    
-                    self.semaphore.acquire()
-                    data_per_year[pub_data['Year']].append(pub_data)
-                    self.semaphore.release()
-                
+                conf_data.setdefault(year, []).extend(year_papers)
+        if completed:
+            print(f"(INCREMENTAL) - {conf}: {len(completed)} units of work already completed")
+        return {year: records.papers(year_papers) for year, year_papers in conf_data.items()}, completed
+
 
 
+    def _resume_jsonl(self, conf, name, checkpoint):
+        """Opens the JSON Lines writer of a conference. The papers are written in the output file while the crawl is running,
+        so they are not kept in memory. In incremental mode, the output file is truncated to the end of the last completed 
+        unit of work and the new papers are appended to it.
 
-    def _get_links(self, conference):
+        Returns:
+            tuple: an empty dictionary (the data is not kept in memory) and the set of completed units (years or paper keys).
+        """
+        path = jsonl.jsonl_path(f"{self.output_dir}/{conf}_{name}", self.compression)
+        completed = set()
+        if not self.incremental:
+            file.remove_checkpoint(checkpoint)
+        else:
+            entries = file.load_checkpoint(checkpoint) if os.path.exists(path) else []
+            if entries:
+                # the records written after the last completed unit of work are discarded
+                os.truncate(path, max(entry['Offset'] for entry in entries))
+                completed.update(entry['Unit'] for entry in entries)
+            elif os.path.exists(path):
+                # the units of the output file (years or papers) are rebuilt from its records and saved in the checkpoint,
+                # in case this execution is interrupted
+                completed.update(self._saved_units((record['Year'], [record]) for record in jsonl.iter_jsonl(path)))
+                file.append_checkpoint_units(checkpoint, sorted(completed), offset=os.path.getsize(path))
+            if completed:
+                print(f"(INCREMENTAL) - {conf}: {len(completed)} units of work already completed")
+
+        def on_commit(units, offset):
+            file.append_checkpoint_units(checkpoint, units, offset=offset)
+
+        self.writers[(conf, name)] = jsonl.JsonlWriter(path, self.compression, append=self.incremental, on_commit=on_commit)
+        return {}, completed
+
+
+
+    def _commit(self, conf, name, conf_data, unit, papers):
+        """Adds the papers obtained in a unit of work to the data of the conference and saves them in the checkpoint file.
+
+        Args:
+            conf (string): The name of the conference.
+            name (string): The name of the data (basic_data, extended_data).
+            conf_data (dict): The data of the conference (by year).
+            unit (string): The identifier of the unit of work (year or paper key).
+            papers (dict): The papers obtained in the unit of work (by year).
+        """
+        if self.output_format == 'jsonl':
+            # the writer saves the unit of work in the checkpoint file once its papers are on disk
+            self.writers[(conf, name)].write([p for year_papers in papers.values() for p in year_papers], unit)
+            return
+        with self.semaphore:
+            for year, year_papers in papers.items():
+                # the papers are kept in memory as compact records until the output file is written
+                conf_data.setdefault(year, []).extend(records.papers(year_papers))
+            file.append_checkpoint(self._checkpoint_path(conf, name), unit, papers)
+
+
+
+    def _finish(self, conf, name, conf_data):
+        """Saves the data of a conference in its output file (or closes its JSON Lines writer) and removes the checkpoint file.
+        With the nested option, the JSON Lines file is also exported to the JSON layout.
+        """
+        output_file = f"{self.output_dir}/{conf}_{name}"
+        if self.output_format == 'jsonl':
+            self.writers.pop((conf, name)).close()
+            if self.nested:
+                file.save_json(output_file, jsonl.to_nested(jsonl.jsonl_path(output_file, self.compression)))
+        else:
+            file.save_json(output_file, dict(sorted(conf_data.items())))
+        file.remove_checkpoint(self._checkpoint_path(conf, name))
+
+
+
+    def _get_dump_records(self, first_year, last_year):
+        """Reads the DBLP dump once and selects the papers of the conferences in the range of years. 
+        A paper is selected if its crossref (or key) belongs to the conference and it is listed in the main year page of the conference.
+        The dump does not have the section headers, so the section filter is applied to the booktitle.
+
+        Args:
+            first_year (int): The first year from which we want to search for information.
+            last_year (int): The last year from which we want to search for information.
+
+        Returns:
+            list: list of tuples with the conference and the record of each selected paper.
+        """
+        conf_prefixes = {f"conf/{conf}": conf for conf in self.conferences}
+        selected = []
+        with metrics.timer('parse_dblp_dump'):
+            for record in dblp_xml.iter_dump(self.dblp_dump):
+                key = record['Crossref'] or record['Key'] or ''
+                conf = conf_prefixes.get('/'.join(key.split('/')[:2]), None)
+                if conf is None or record['Year'] is None or not first_year <= int(record['Year']) <= last_year:
+                    continue
+                if record['Url'] is None or self._get_link_year(conf, f"https://dblp.org/{record['Url'].split('#')[0]}") is None:
+                    continue
+                if self._filter_section(record['Booktitle'], None):
+                    continue
+                selected.append((conf, record))
+        return selected
+
+
+
+    def _get_html_publications(self, link):
+        """Get the data of the papers of a year page parsing its HTML.
+
+        Args:
+            link (string): The link of the year page of the conference.
+
+        Yields:
+            dict: the data of each paper (None if the paper is filtered).
+        """
+        pub_list_raw = self._get_pub_list(link)
+        items = []
+        for pub in pub_list_raw:
+            article_items = pub.find_all('li', {'itemtype': 'http://schema.org/ScholarlyArticle'})
+            header_h2 = pub.find_previous('h2')
+            header_h3 = pub.find_previous('h3')
+            if self._filter_section(header_h2.text if header_h2 is not None else None, 
+                                    header_h3.text if header_h3 is not None else None):
+                continue
+            items.extend(article_items)
+
+        # the OpenAlex works of all the papers of the page are requested together
+        openalex_data = self._get_openalex_data_many([self._get_html_openalex_link(child) for child in items])
+        for child in items:
+            yield self._get_dblp_paper_data(child, openalex_data)
+
+
+
+    def _get_xml_publications(self, link):
+        """Get the data of the papers of a year page using its XML export (the same link ending in .xml).
+
+        Args:
+            link (string): The link of the year page of the conference.
+
+        Returns:
+            list: the data of each paper (None if the paper is filtered) or None if the XML is not available.
+        """
+        xml_link = link.replace('.html', '.xml')
+        response = http_client.get(xml_link, timeout=10)
+        if response.status_code != 200:
+            logging.warning(f"(BASE) - {response.status_code} in request for link {xml_link}, using the HTML page")
+            return None
+        try:
+            with metrics.timer('parse_dblp_xml'):
+                publications = dblp_xml.parse_toc(io.BytesIO(response.content))
+        except etree.XMLSyntaxError as e:
+            logging.warning(f"(BASE) - Error parsing {xml_link} ({e}), using the HTML page")
+            return None
+
+        selected = [record for header_h2, header_h3, record in publications if not self._filter_section(header_h2, header_h3)]
+        # the OpenAlex works of all the papers of the page are requested together
+        openalex_data = self._get_openalex_data_many([self._get_record_openalex_link(record) for record in selected])
+        return [self._get_dblp_record_data(record, openalex_data) for record in selected]
+
+
+
+    def _get_dblp_record_data(self, record, prefetched=None):
+        """This function completes the data of a paper obtained from the DBLP XML with the OpenAlex data.
+
+        Args:
+            record (dict): the paper data obtained with dblp_xml.element_to_record.
+            prefetched (dict, optional): the OpenAlex data already obtained for the papers of the page (link as key).
+
+        Returns:
+            dict: All the paper data (None if the paper is filtered).
+        """
+        paper_title = record['Title']
+        if paper_title is None or self._filter_paper_title(paper_title):
+            return None
+
+        openalex_link = self._get_record_openalex_link(record)
+        openalex_data = None
+        if openalex_link is not None:
+            openalex_data = prefetched.get(openalex_link) if prefetched is not None else self._get_openalex_data(openalex_link)
+        if openalex_data is not None:
+            doi_number, authors_institutions, referenced_works = openalex_data
+        else:
+            doi_number, authors_institutions, referenced_works = None, None, None
+
+        if authors_institutions is None:
+            authors_institutions = [{'Author': author, 'Institutions': None} for author in record['Authors']]
+
+        return {'Title': paper_title,
+                'Year': record['Year'],
+                'DOI Number': doi_number,
+                'OpenAlex Link': openalex_link, 
+                'Authors and Institutions': authors_institutions,
+                'OpenAlex Referenced Works': referenced_works}
+
+
+
+    def _get_links(self, conference, max_age=None):
         """Search for the links for each year of a specific conference
 
         Args:
             conference (string): name of the conference in the dblp link
+            max_age (float, optional): maximum age in seconds of the cached conference page
 
         Returns:
             list: list with all the links for each year
         """    
         # obtain the links for every year
         url = "https://dblp.org/db/conf/" + conference + "/"
-        html_page = requests.get(url, timeout=10)
+        html_page = http_client.get(url, timeout=10, max_age=max_age)
         soup = BeautifulSoup(html_page.text, 'html.parser')
         link_list = set()
         for link_elem in soup.findAll('a'):
@@ -106,17 +467,40 @@ class BaseCrawler:
         Returns:
             bs4 object: returns a list of bs4 objects with the class publ-list
         """    
-        resp = requests.get(link, timeout=10)
-        soup = BeautifulSoup(resp.content, features="lxml")
-        return soup.findAll("ul", attrs={"class": "publ-list"})
+        resp = http_client.get(link, timeout=10)
+        with metrics.timer('parse_dblp_html'):
+            soup = BeautifulSoup(resp.content, features="lxml")
+            return soup.findAll("ul", attrs={"class": "publ-list"})
     
 
 
-    def _get_dblp_paper_data(self, publication):
+    def _get_record_openalex_link(self, record):
+        # DBLP builds the OpenAlex link of a paper with its DOI (the filtered papers are not requested)
+        if record['Title'] is None or self._filter_paper_title(record['Title']) or not record['DOI']:
+            return None
+        return f"https://api.openalex.org/works/https://doi.org/{record['DOI']}"
+
+
+
+    def _get_html_openalex_link(self, publication):
+        """Returns the OpenAlex link of a paper of the HTML page (None if it has no link or if the paper is filtered)."""
+        title = publication.find('span', attrs={"class": "title", "itemprop": "name"})
+        if title is None or self._filter_paper_title(title.text):
+            return None
+        for content_item in publication.contents:
+            if 'publ' in content_item.attrs.get('class', [0]):
+                links = [l.get("href") for l in content_item.contents[0].findAll("a") if "openalex" in l.get("href")]
+                return links[0] if links else None
+        return None
+
+
+
+    def _get_dblp_paper_data(self, publication, prefetched=None):
         """This function extracts all the data to then pass it to the search() function.
 
         Args:
             publication (bs4 object): bs4 object with the class publ-list.
+            prefetched (dict, optional): the OpenAlex data already obtained for the papers of the page (link as key).
 
         Returns:
             dict: All the paper data.
@@ -149,7 +533,9 @@ class BaseCrawler:
                 links = content_item.contents[0].findAll("a")
                 openalex_link = [l.get("href") for l in links if "openalex" in l.get("href")]
                 openalex_data = None
-                if openalex_link != []:
+                if openalex_link != [] and prefetched is not None:
+                    openalex_data = prefetched.get(openalex_link[0])
+                elif openalex_link != []:
                     openalex_data = self._get_openalex_data(openalex_link[0])
                 
                 if openalex_data is not None:
@@ -173,6 +559,8 @@ class BaseCrawler:
 
     def _get_openalex_data(self, link):
         """Function that extracts the authors and institutions data and the referenced works from the OpenAlex API.
+        If several threads ask for the same work at the same time it is only requested once, and the result is kept for the
+        rest of the execution.
 
         Args:
             openalex_link (string): the link to the OpenAlex API work obtained from the initial data (dblp).
@@ -180,12 +568,55 @@ class BaseCrawler:
         Returns:
             tuple: authors and institutions data and the referenced works or None if there is no data.
         """    
-        response = requests.get(link)
+        return openalex_works.get(self._openalex_key(link), lambda _: self._request_openalex_data(link))
+
+
+
+    def _get_openalex_data_many(self, links):
+        """Gets the OpenAlex data of a list of works (e.g. all the papers of a year page). The works that are not in memory are
+        requested together, so the async engine sends them concurrently (see http_client.request_many).
+
+        Args:
+            links (list): the links to the OpenAlex API works (None for the papers without link).
+
+        Returns:
+            dict: dictionary with the link as key and the data of _get_openalex_data as value.
+        """
+        links_by_key = {self._openalex_key(link): link for link in links if link is not None}
+        if not links_by_key:
+            return {}
+
+        def fetch_many(keys):
+            keys_links = [(key, links_by_key[key]) for key in keys]
+            responses = http_client.request_many([{'method': 'GET', 'url': link} for _, link in keys_links])
+            results = {}
+            for (key, link), response in zip(keys_links, responses):
+                data = self._extract_openalex_data(link, response)
+                if data is not None:
+                    results[key] = data
+            return results
+
+        data = openalex_works.get_many(list(links_by_key), fetch_many)
+        return {link: data[key] for key, link in links_by_key.items()}
+
+
+
+    def _openalex_key(self, link):
+        return link.split('doi.org/', 1)[1].lower() if 'doi.org/' in link else link
+
+
+
+    def _request_openalex_data(self, link):
+        return self._extract_openalex_data(link, http_client.get(link))
+
+
+
+    def _extract_openalex_data(self, link, response):
         if response.status_code == 200:
             response_data = response.json()
             doi_link = response_data['doi']
             doi_number = doi_link.replace("https://doi.org/", "")
-            authors_institutions = self._get_authors_and_institutions(response_data)
+            authors_institutions = records.authors(self._get_authors_and_institutions(response_data))
             referenced_works = self._get_referenced_works_openalex(response_data)
             return doi_number, authors_institutions, referenced_works if referenced_works != [] else None
         else:
@@ -205,12 +636,16 @@ class BaseCrawler:
         """    
         auth_data = []
         authors = response_data['authorships']
+        # the institutions data usually comes inline in the authorships, only the missing ones are requested (in bulk)
+        table = get_institution_table()
+        ids = [table.add(inst) for a in authors for inst in a['institutions']]
+        resolved = table.resolve(ids)
         for a in authors:
             institutions = []
             author_name = a['author']['display_name']
             author_institutions = a['institutions']
             for inst in author_institutions:
-                institution_data = self._get_institution_data(inst)
+                institution_data = self._get_institution_data(inst, resolved)
                 institutions.append(institution_data)
             
             auth_data.append({'Author': author_name, 'Institutions': institutions})
@@ -219,26 +654,27 @@ class BaseCrawler:
 
 
 
-    def _get_institution_data(self, institution):
-        """Function that extracts the institution data from the OpenAlex API response. Used in the _get_authors_and_institutions function.
+    def _get_institution_data(self, institution, resolved=None):
+        """Function that gets the institution data from the institution table of the process. If the institution is not in the table, 
+        it is requested to the OpenAlex API. Used in the _get_authors_and_institutions function.
 
         Args:
-            institution (string): OpenAlex Institution ID.
+            institution (dict): OpenAlex institution object of an authorship.
+            resolved (dict, optional): institutions data already resolved with InstitutionTable.resolve.
 
         Returns:
             dict: dicctionary with the institution name and country.
         """    
+        if institution.get('id') is None:
+            return None
         id_inst = institution['id'].replace("https://openalex.org/", "")
-        url = f"https://api.openalex.org/institutions/{id_inst}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            response_data = response.json()
-            institution_name = response_data.get('display_name', None)
-            institution_country = response_data.get('country_code', None)
-            return {'Institution Name': institution_name, 'Country': institution_country}
-        else:
-            logging.error(f"(BASE) - {response.status_code} in request for link {url}")
+        if resolved is None or id_inst not in resolved:
+            resolved = get_institution_table().resolve([id_inst])
+        institution_data = resolved[id_inst]
+        if institution_data is None:
+            logging.error(f"(BASE) - Institution {id_inst} not found in OpenAlex")
             return None
+        return dict(institution_data)
 
 
 
@@ -261,11 +697,12 @@ class BaseCrawler:
     
 
 
-    def _filter_section(self, header_h2, header_h3):
+    def _filter_section(self, header_h2_text, header_h3_text):
         """Filter the articles that are not relevant to the search.
 
         Args:
-            header (string): header of the publication
+            header_h2_text (string): text of the h2 header of the publication
+            header_h3_text (string): text of the h3 header of the publication
 
         Returns:
             boolean: True if this secction was to be skipped, False otherwise
@@ -275,8 +712,8 @@ class BaseCrawler:
                                  "demo", "doctoral", "posters", "short papers", "demos", "short paper", "tutorials", 
                                  "demonstration", "PhD Symposium"]
         
-        header_h2_text = header_h2.text if header_h2 is not None else ""
-        header_h3_text = header_h3.text if header_h3 is not None else ""
+        header_h2_text = header_h2_text if header_h2_text is not None else ""
+        header_h3_text = header_h3_text if header_h3_text is not None else ""
         lower_header_h2 = header_h2_text.lower().replace('\n', '')
         lower_header_h3 = header_h3_text.lower().replace('\n', '')
 
@@ -307,12 +744,13 @@ class BaseCrawler:
 
 
 
-    def _filter_dblp_links(self, conf, link):
-        """ Filters the dblp obtained links to match only the base conference"""
+    def _get_link_year(self, conf, link):
+        """ Filters the dblp obtained links to match only the base conference and returns the year of the link (None if it does not match)"""
         # socc is the only conference that has a different name in the link
         # remebmer to add more conferences if needed
         if conf == "cloud": conf2 = "socc"
         else: conf2 = conf
             
-        pattern = rf"https://dblp.org/db/conf/{conf}/{conf2}\d{{4}}\.html"
-        return bool(re.match(pattern, link))
\ No newline at end of file
+        pattern = rf"https://dblp.org/db/conf/{conf}/{conf2}(\d{{4}})\.html"
+        coincidence = re.match(pattern, link)
+        return coincidence.group(1) if coincidence else None
\ No newline at end of file
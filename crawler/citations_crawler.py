@@ -2,141 +2,324 @@ from crawler.base_crawler import BaseCrawler
 import threading
 import time
 import sys
+import os
 from auxiliar import file
 from auxiliar import thread
-import requests
+from auxiliar import http_client
+from auxiliar import jsonl
+from auxiliar import records
+from auxiliar.paper_index import get_paper_index
+from auxiliar.single_flight import SingleFlight
+from auxiliar.batcher import Batcher
 import logging
 
 all_citation_data = {}
-papers_data = []
-all_papers_id = {}
+
+# default directory of the extended data of the conferences
+EXTENDED_DATA_DIR = './data/extended_crawler_data'
+S2_BATCH_URL = "https://api.semanticscholar.org/graph/v1/paper/batch"
+S2_BATCH_FIELDS = 'title,year,venue,externalIds,authors.name'
+# maximum number of IDs that the Semantic Scholar batch endpoint accepts in one request
+S2_BATCH_SIZE = 500
+OPENALEX_WORKS_URL = "https://api.openalex.org/works"
+# maximum number of values that OpenAlex accepts in an OR filter
+OPENALEX_BATCH_SIZE = 50
+# title and authors of the cited works already requested to OpenAlex in this execution (by DOI), shared by all the threads
+openalex_works = SingleFlight()
+# data of the cited papers already resolved in this execution (by S2 Paper ID), shared by all the threads
+cited_papers = SingleFlight()
 
 
 class CitationsCrawler(BaseCrawler):
-    def __init__(self, conferences, years, num_threads, output_dir):
-        super().__init__(conferences, years, num_threads, output_dir)
-        self.semaphore_s2 = threading.Semaphore(1)
+    def __init__(self, conferences, years, num_threads, output_dir, incremental=False, output_format='json', compression=None, nested=False,
+                 extended_dir=EXTENDED_DATA_DIR):
+        super().__init__(conferences, years, num_threads, output_dir, incremental=incremental,
+                         output_format=output_format, compression=compression, nested=nested)
+        # directory of the extended data (the input of the crawler)
+        self.extended_dir = extended_dir
         self.semaphore_oa = threading.Semaphore(1)
+        # the cited papers asked by all the threads are packed in full requests to the Semantic Scholar batch endpoint
+        self.s2_batches = Batcher(self._request_s2_batch, S2_BATCH_SIZE)
+        self.resolved = {}
+        self.pending_years = {}
+        # years (completed) and citing papers (saved, by title and S2 Paper ID) of each conference obtained in a previous execution
+        self.completed = {}
+        self.saved_papers = {}
 
 
 
     def crawl(self):
         initial_time = time.time()
         first_year, last_year = self.years
+        global all_citation_data
+        all_citation_data = {}
+
+        self._index_papers(self.conferences, self.extended_dir)
+
+        # the citation graph: the S2 Paper IDs of the cited papers of every citing paper of every conference
+        citations = {}
         for conf in self.conferences:
             print(f"(CITATIONS) - Crawling citations data for the conference {conf}...")
-            global papers_data
-            papers_data = []
-            global all_citation_data
-            all_citation_data = {}
-
-            data_dir = f"./data/extended_crawler_data/{conf}_extended_data"
-            if file.exists_file(data_dir):
-                extended_data = file.load_json(data_dir)
+
+            data_dir = f"{self.extended_dir}/{conf}_extended_data"
+            if file.exists_data(data_dir):
+                extended_data = file.load_data(data_dir, years=range(first_year, last_year + 1))
             else:
                 sys.exit(f"Error: The extended data for the conference {conf} does not exist. Please run the extended crawler first.")
-                
-            self._get_all_paper_data(self.conferences)
 
-            threads = thread.Thread(self.num_threads)
+            self._open_output(conf)
+            citations[conf] = {}
+            for year in range(first_year, last_year + 1):
+                if not file.year_exists_in_file(year, self.completed[conf]):
+                    citations[conf][str(year)] = self._get_citations_ids(conf, extended_data.get(str(year), []))
+
+        # every cited paper is resolved once, even if it is cited by many papers of many conferences. The different cited
+        # papers are split in units of S2_BATCH_SIZE papers (one request to the Semantic Scholar batch endpoint)
+        paper_ids = list(dict.fromkeys(paper_id for conf_citations in citations.values() for year_citations in conf_citations.values()
+                                       for ids in year_citations.values() for paper_id in ids))
+        num_citations = sum(len(ids) for conf_citations in citations.values() for year_citations in conf_citations.values()
+                            for ids in year_citations.values())
+        print(f"(CITATIONS) - Resolving {len(paper_ids)} different cited papers of {num_citations} citations...")
+        self.resolved = {}
+        units = [(paper_ids[ini:ini + S2_BATCH_SIZE],) for ini in range(0, len(paper_ids), S2_BATCH_SIZE)]
+        threads = thread.Thread(self.num_threads)
+        threads.run(self._resolve_cited_papers, units)
+
+        # the data of each cited paper is shared by all the papers that cite it. Every year is saved in the checkpoint file
+        for conf in self.conferences:
+            for year, year_citations in citations[conf].items():
+                self._add_citations(conf, year, year_citations, self.resolved)
+            self._save_output(conf)
+
+        records.clear()
+        final_time = time.time()
+        minutes = (final_time - initial_time) / 60
+        print(f"(CITATIONS) - Done in {minutes:.3f} minutes")
 
-            # SEMANTIC SCHOLAR API
 
-            # if you want to use threads do not comment the following lines
-            # be aware that using threads for the Semantic Scholar API may cause some requests to fail
-            # threads.run(self._search_citations_data, (extended_data, first_year, last_year))
 
-            # comment the following line if you want to use threads
-            self._search_citations_data(extended_data, first_year, last_year)
+    def _open_output(self, conf):
+        """Prepares the output of a conference: a dictionary in memory (JSON) or a JSON Lines writer. In incremental mode,
+        the citations of the output file and of the checkpoint file are kept: the years of the checkpoint file are not
+        crawled again and the citing papers of the output file are not written again.
+        """
+        output_file = f"{self.output_dir}/{conf}_citations_data"
+        checkpoint = self._checkpoint_path(conf, 'citations_data')
+        all_citation_data[conf] = {}
+        self.completed[conf] = set()
+        self.saved_papers[conf] = set()
+        if not self.incremental:
+            file.remove_checkpoint(checkpoint)
+        elif self.output_format == 'jsonl':
+            path = jsonl.jsonl_path(output_file, self.compression)
+            entries = file.load_checkpoint(checkpoint) if os.path.exists(path) else []
+            if entries:
+                # the citing papers written after the last completed year are discarded
+                os.truncate(path, max(entry['Offset'] for entry in entries))
+                self.completed[conf].update(entry['Unit'] for entry in entries)
+            if os.path.exists(path):
+                self.saved_papers[conf].update((record['Title'], record.get('S2 Paper ID')) for record in jsonl.iter_jsonl(path))
+        else:
+            all_citation_data[conf] = file.load_json(output_file) or {}
+            for entry in file.load_checkpoint(checkpoint):
+                self.completed[conf].add(entry['Unit'])
+                all_citation_data[conf].update(entry['Data'])
+            # the JSON layout only has the titles of the citing papers
+            self.saved_papers[conf].update((title, None) for title in all_citation_data[conf])
+        if self.completed[conf] or self.saved_papers[conf]:
+            print(f"(INCREMENTAL) - {conf}: {len(self.completed[conf])} years and {len(self.saved_papers[conf])} citing papers already completed")
+
+        if self.output_format == 'jsonl':
+            def on_commit(units, offset):
+                file.append_checkpoint_units(checkpoint, units, offset=offset)
+
+            output_path = jsonl.jsonl_path(output_file, self.compression)
+            self.writers[(conf, 'citations_data')] = jsonl.JsonlWriter(output_path, self.compression, append=self.incremental,
+                                                                        on_commit=on_commit)
+
+
+
+    def _save_output(self, conf):
+        """Saves the citations data of a conference in its output file (or closes its JSON Lines writer) and removes the checkpoint file."""
+        output_file = f"{self.output_dir}/{conf}_citations_data"
+        if self.output_format == 'jsonl':
+            self.writers.pop((conf, 'citations_data')).close()
+            if self.nested:
+                file.save_json(output_file, jsonl.to_nested(jsonl.jsonl_path(output_file, self.compression), key='Title', value='Cited Papers'))
+        else:
+            file.save_json(output_file, all_citation_data[conf])
+        file.remove_checkpoint(self._checkpoint_path(conf, 'citations_data'))
 
-            # save the data obtained from the Semantic Scholar API (intermediate data)
-            file.save_json(f"{self.output_dir}/intermediate_data_s2/{conf}_citations_s2", papers_data)
 
-            # OPENALEX API
 
-            # check if there is intermediate data
-            intermediate_data_dir = f"{self.output_dir}/intermediate_data_s2/{conf}_citations_s2"
-            if file.exists_file(intermediate_data_dir):
-                intermediate_data = file.load_json(intermediate_data_dir)
-            else:
-                sys.exit(f"Error: The intermediate data for the conference {conf} does not exist. Please run the citations crawler again.")
+    def _get_citations_ids(self, conf, year_papers):
+        """Returns the Semantic Scholar IDs of the cited papers of each paper (by title and S2 Paper ID, so the papers with
+        the same title are not mixed). The papers already saved in the output file are skipped.
+        """
+        papers = {}
+        # obtain all the papers ids from the citations
+        try:
+            for paper in year_papers:
+                key = (paper["Title"], paper.get("S2 Paper ID"))
+                if key in self.saved_papers[conf] or (paper["Title"], None) in self.saved_papers[conf]:
+                    continue
+                citations = paper.get("Citations S2", [])
 
-            threads.run(self._get_citation_data, (intermediate_data, 0, len(intermediate_data)))
-            
-            file.save_json(f"{self.output_dir}/{conf}_citations_data", all_citation_data)
+                if citations:
+                    paper_ids = [citation["paperId"] for citation in citations if citation.get("paperId")]
+                    papers[key] = paper_ids
+        except KeyError:
+            pass
+        return papers
 
-        final_time = time.time()
-        minutes = (final_time - initial_time) / 60
-        print(f"(CITATIONS) - Done in {minutes:.3f} minutes")
 
 
+    def _add_citations(self, conf, year, citing_papers, cited):
+        """Adds the cited papers of the citing papers of a year to the output of the conference and saves the year in the
+        checkpoint file.
 
-    def _search_citations_data(self, data, start_year, end_year):
-        papers = {}
-        for year in range(start_year, end_year + 1):
-
-            # obtain all the papers ids from the citations
-            try:
-                for paper in data.get(str(year), []):
-                    citations = paper.get("Citations S2", [])
-
-                    if citations:
-                        paper_ids = [citation["paperId"] for citation in citations if citation.get("paperId")]
-                        papers[paper["Title"]] = paper_ids
-            except KeyError:
-                pass
-
-        self._batch_request_s2(papers)
-
-
-
-    def _batch_request_s2(self, papers):
-        url_s2 = "https://api.semanticscholar.org/graph/v1/paper/batch"
-        #print("Making requests to Semantic Scholar API...")
-        for title, citations in papers.items():
-            responses = []
-            if len(citations) > 0:
-                citations_len = len(citations)
-                num_iterations = citations_len // 500
-                rest = num_iterations + 1 if citations_len % 500 > 0 else num_iterations
-                for j in range(rest):
-                    ini = j * 500
-                    fin = min((j + 1) * 500, citations_len)
-                    c = citations[ini:fin]
-                    r = self._make_request_with_retries(url_s2, c)
-                    if r.status_code == 200:
-                        for paper in r.json():
-                            responses.append(paper)
-                    else:
-                        logging.error(f"(CITATIONS) - {r.status_code} in request for paper {title}")
-                time.sleep(0.75)
-
-            # do not comment the semaphore lines if you are using threads
-            # self.semaphore_s2.acquire
-            papers_data.append({"Title": title, "Response": responses})
-            # self.semaphore_s2.release()
-
-
-
-    def _get_citation_data(self, data, start, end):
-        for elem in data[start:end]:
-            cited_data = []
-            main_paper_title = elem.get("Title", None)
-            response = elem.get("Response", None)
-            if response == [] or response is None: continue
-
-            for cited_paper in response:
-                data = self._get_cited_paper_data(cited_paper)
-                cited_data.append(data)
-            
-            self.semaphore_oa.acquire()
-            all_citation_data[main_paper_title] = cited_data
-            self.semaphore_oa.release()
-
-
-
-    def _get_cited_paper_data(self, cited_paper):
-        url_openalex = "https://api.openalex.org/works/"    
+        Args:
+            conf (string): the name of the conference.
+            year (string): the year of the citing papers.
+            citing_papers (dict): the S2 Paper IDs of the cited papers of each citing paper (by title and S2 Paper ID).
+            cited (dict): the data of the cited papers (by S2 Paper ID).
+        """
+        year_data = {}
+        for main_paper, paper_ids in citing_papers.items():
+            cited_data = [cited.get(paper_id, None) for paper_id in paper_ids]
+            # the papers whose cited papers were not found in Semantic Scholar are skipped
+            if all(data_cited is None for data_cited in cited_data): continue
+            year_data[main_paper] = cited_data
+
+        if self.output_format == 'jsonl':
+            # the writer saves the year in the checkpoint file once its citing papers are on disk
+            self.writers[(conf, 'citations_data')].write([{"Title": title, "S2 Paper ID": paper_id, "Cited Papers": cited_data}
+                                                          for (title, paper_id), cited_data in year_data.items()], year)
+            return
+        # the JSON layout is by title
+        year_data = {title: cited_data for (title, _), cited_data in year_data.items()}
+        with self.semaphore_oa:
+            all_citation_data[conf].update(year_data)
+            file.append_checkpoint(self._checkpoint_path(conf, 'citations_data'), year, year_data)
+
+
+
+    def _resolve_cited_papers(self, paper_ids):
+        """Unit of work: resolves a group of different cited papers and keeps their data for the output."""
+        cited = self._get_cited_papers(paper_ids)
+        with self.semaphore:
+            self.resolved.update(cited)
+
+
+
+    def _get_year_citations_s2(self, conf, year, year_papers):
+        """Pipeline stage: gets the citation graph of the papers of a year and splits its cited papers in units of
+        S2_BATCH_SIZE papers.
+
+        Returns:
+            list: the items for the next stage (conf, year, citing papers, S2 Paper IDs of the unit, number of units).
+        """
+        if file.year_exists_in_file(year, self.completed[conf]):
+            return []
+        citing_papers = self._get_citations_ids(conf, year_papers)
+        paper_ids = list(dict.fromkeys(paper_id for ids in citing_papers.values() for paper_id in ids))
+        batches = [paper_ids[ini:ini + S2_BATCH_SIZE] for ini in range(0, len(paper_ids), S2_BATCH_SIZE)]
+        if not batches:
+            self._add_citations(conf, year, citing_papers, {})
+        return [(conf, year, citing_papers, batch, len(batches)) for batch in batches]
+
+
+
+    def _get_citation_data(self, conf, year, citing_papers, paper_ids, num_units):
+        """Pipeline stage: resolves the cited papers of a unit (the ones resolved before for other years are not requested again)."""
+        return [(conf, year, citing_papers, self._get_cited_papers(paper_ids), num_units)]
+
+
+
+    def _collect_citation_data(self, conf, year, citing_papers, cited, num_units):
+        """Last pipeline stage (one thread): adds the citations of a year to the output when all its units are resolved."""
+        resolved, ready = self.pending_years.setdefault((conf, year), ({}, [0]))
+        resolved.update(cited)
+        ready[0] += 1
+        if ready[0] < num_units:
+            return []
+        del self.pending_years[(conf, year)]
+        self._add_citations(conf, year, citing_papers, resolved)
+        return []
+
+
+
+    def _get_cited_papers(self, paper_ids):
+        """Returns the data of a list of cited papers. Each cited paper is only resolved once in the execution, even if
+        several threads need it at the same time.
+
+        Args:
+            paper_ids (list): the S2 Paper IDs of the cited papers.
+
+        Returns:
+            dict: dictionary with the S2 Paper ID as key and the data of the cited paper (None if it was not found) as value.
+        """
+        return cited_papers.get_many(paper_ids, self._request_cited_papers)
+
+
+
+    def _request_cited_papers(self, paper_ids):
+        """Gets the data of a list of cited papers: their Semantic Scholar data, and the authors and institutions of the paper
+        index (for the crawled papers) or of OpenAlex (requested by DOI, in batches).
+
+        Returns:
+            dict: dictionary with the S2 Paper ID as key and the data of the cited paper as value (only the papers found).
+        """
+        s2_papers = self._get_s2_papers(paper_ids)
+
+        # the cited papers that were already crawled are taken from the paper index
+        indexed_papers = get_paper_index().get_many('s2', [cited_paper.get("paperId", None) for cited_paper in s2_papers.values()])
+
+        # the cited papers with DOI are requested together to OpenAlex
+        dois = []
+        for cited_paper in s2_papers.values():
+            if cited_paper.get("paperId", None) in indexed_papers:
+                continue
+            doi = (cited_paper.get("externalIds", None) or {}).get("DOI", None)
+            if doi is not None:
+                dois.append(doi)
+        openalex_data = self._get_openalex_works_by_doi(dois)
+
+        return {paper_id: records.cited_work(self._get_cited_paper_data(cited_paper, openalex_data, indexed_papers))
+                for paper_id, cited_paper in s2_papers.items()}
+
+
+
+    def _get_s2_papers(self, paper_ids):
+        """Gets the Semantic Scholar data of a list of papers with the batch endpoint. The IDs of all the threads are sent
+        together in requests of up to S2_BATCH_SIZE IDs (see auxiliar.batcher.Batcher), and the requests of the threads
+        share the rate limiter of Semantic Scholar.
+
+        Args:
+            paper_ids (list): the S2 Paper IDs of the papers.
+
+        Returns:
+            dict: dictionary with the S2 Paper ID as key and the Semantic Scholar data as value (only the papers found).
+        """
+        return self.s2_batches.get_many(paper_ids)
+
+
+
+    def _request_s2_batch(self, batch):
+        s2_papers = {}
+        r = http_client.post(S2_BATCH_URL, params={'fields': S2_BATCH_FIELDS}, json={"ids": batch})
+        if r.status_code != 200:
+            logging.error(f"(CITATIONS) - {r.status_code} in batch request for {len(batch)} cited papers to Semantic Scholar")
+            return s2_papers
+        # the batch endpoint returns the papers in the same order as the IDs (null if not found)
+        for paper_id, paper in zip(batch, r.json()):
+            if paper is not None:
+                s2_papers[paper_id] = paper
+        return s2_papers
+
+
+
+    def _get_cited_paper_data(self, cited_paper, openalex_data, indexed_papers):
         # if there is no data, continue with the next paper
         if cited_paper is None:
             return
@@ -149,51 +332,77 @@ class CitationsCrawler(BaseCrawler):
         year = cited_paper.get("year", None)
 
         # check if the paper is in the already existing data
-        if paper_id in all_papers_id:
-            authors = all_papers_id[paper_id]["Paper"]['Authors and Institutions']
-            venue = all_papers_id[paper_id]['Conference']
-            year = all_papers_id[paper_id]["Paper"]['Year']
+        if paper_id in indexed_papers:
+            authors = indexed_papers[paper_id]['Authors and Institutions']
+            venue = indexed_papers[paper_id]['Conference']
+            year = indexed_papers[paper_id]['Year']
         elif link is not None:
-            title_aux, authors = self._get_openalex_data(f"{url_openalex}https://doi.org/{link}")
-            if title_aux == "not found":
-                title = title_aux
+            _, authors = openalex_data.get(link.lower(), (None, None))
         else:  
             auth = cited_paper["authors"]
             for a in auth:
                 authors.append({"Author": a["name"], "Institutions": None})
-        
-        time.sleep(0.5)
 
         return {"Title": title, "Authors": authors, "Venue": venue, "Year": year}
     
 
 
-    def _get_openalex_data(self, openalex_link):
-        """Function that extracts the authors and institutions data and the referenced works from the OpenAlex API.
+    def _get_openalex_works_by_doi(self, dois):
+        """Function that extracts the title and the authors and institutions data of a list of works from the OpenAlex API. 
+        The works are requested in batches using the filter doi:a|b|c.
 
         Args:
-            openalex_link (string): the link to the OpenAlex API work obtained from the initial data (dblp).
+            dois (list): list with the DOIs of the works.
 
         Returns:
-            tuple: authors and institutions data and the referenced works or None if there is no data.
+            dict: dictionary with the DOI (in lower case) as key and a tuple with the title and the authors and institutions data as value.
         """    
-        response = requests.get(openalex_link)
-        if response.status_code == 200:
-            response_data = response.json()
-            title = response_data.get('title', None)
-            authors_institutions = self._get_authors_and_institutions(response_data)
-            return title, authors_institutions
-        else:
-            logging.error(f"(CITATIONS) - {response.status_code} in request for link {openalex_link}")
-            return  None, None
+        # the works cited by many papers are only requested once, even if several threads need them at the same time
+        works = openalex_works.get_many([doi.lower() for doi in dois], self._request_openalex_works)
+        return {doi: work for doi, work in works.items() if work is not None}
+
+
+
+    def _request_openalex_works(self, dois):
+        # the DOIs with commas or pipes can not be used in a filter, they are requested one by one
+        batchable = [doi for doi in dois if ',' not in doi and '|' not in doi]
+        works = {}
+        batches = [batchable[ini:ini + OPENALEX_BATCH_SIZE] for ini in range(0, len(batchable), OPENALEX_BATCH_SIZE)]
+        requests_args = [{'method': 'GET', 'url': OPENALEX_WORKS_URL,
+                          'params': {'filter': f"doi:{'|'.join(batch)}", 'per-page': OPENALEX_BATCH_SIZE}}
+                         for batch in batches]
+        # with the async engine all the batches are requested concurrently
+        for batch, response in zip(batches, http_client.request_many(requests_args)):
+            if response.status_code != 200:
+                logging.error(f"(CITATIONS) - {response.status_code} in request for {len(batch)} DOIs to OpenAlex")
+                continue
+            for response_data in response.json().get('results', []):
+                if response_data.get('doi') is not None:
+                    works[response_data['doi'].replace("https://doi.org/", "").lower()] = self._extract_openalex_work(response_data)
+
+        for doi in dois:
+            if doi in batchable:
+                continue
+            response = http_client.get(f"{OPENALEX_WORKS_URL}/https://doi.org/{doi}")
+            if response.status_code == 200:
+                works[doi] = self._extract_openalex_work(response.json())
+            else:
+                logging.error(f"(CITATIONS) - {response.status_code} in request for DOI {doi} to OpenAlex")
+        return works
+
+
+
+    def _extract_openalex_work(self, response_data):
+        title = response_data.get('title', None)
+        return title, records.authors(self._get_authors_and_institutions(response_data))
 
 
 
     def _get_authors_and_institutions(self, response_data):
-        """This function extracts the authors and institutions data from the OpenAlex API response. Used in the _get_openalex_data function.
+        """This function extracts the authors and institutions data from the OpenAlex API response. Used in the _get_openalex_works_by_doi function.
 
         Args:
-            response_data (json): the data obtained from the OpenAlex API response in the function _get_openalex_data.
+            response_data (json): the data of a work obtained from the OpenAlex API response in the function _get_openalex_works_by_doi.
 
         Returns:
             list: a list with all the authors and their institutions data.
@@ -219,42 +428,18 @@ class CitationsCrawler(BaseCrawler):
 
 
     
-    def _get_all_paper_data(self, conferences):  
-        for conf in conferences:
-            data = file.load_json(f"./data/extended_crawler_data/{conf}_extended_data")
-            for year, paper in data.items():
-                for p in paper:
-                    all_papers_id[p["S2 Paper ID"]] = {"Paper": p, "Conference": conf}
-
-
-
-    def _make_request_with_retries(self, url, c,  retries=2, initial_sleep=2.0, backoff_factor=5.0):
-        """Function that makes a request to an API and returns the response data. Used in the _get_paper_s2_data_request function.
+    def _index_papers(self, conferences, extended_dir):
+        """Adds to the paper index the extended data of the conferences that are not in it yet
+        (the extended crawler updates the index, this is only needed for the data crawled before the index existed).
 
         Args:
-            url (string): the URL of the API.
-            params (dict): the parameters for the request.
-            retries (int, optional): number of retries. Defaults to 2.
-            initial_sleep (int, optional): initial sleep time. Defaults to 1.
-            backoff_factor (int, optional): backoff factor. Defaults to 5.
-
-        Returns:
-            response object: the response data.
+            conferences (list): the names of the conferences.
+            extended_dir (string): the directory of the extended data.
         """
-
-        for attempt in range(retries+1):
-            response = requests.post(url,
-                        params={'fields': 'title,year,venue,externalIds,authors.name'},
-                        json={"ids": c})
-
-            # if the response is successful, return it
-            if response.status_code == 200:
-                return response
-            # if the response is 429 or 504, sleep and try
-            elif response.status_code == 429 or response.status_code == 504:
-                print("Sleeping...")
-                time.sleep((initial_sleep + attempt) * backoff_factor)
-                print("Retrying...")
-            else: # if the response is not successful, return None
-                break
-        return response
\ No newline at end of file
+        index = get_paper_index()
+        for conf in conferences:
+            data_dir = f"{extended_dir}/{conf}_extended_data"
+            if index.has_conference(conf) or not file.exists_data(data_dir):
+                continue
+            for year, papers in file.load_data(data_dir).items():
+                index.add_papers(conf, papers)
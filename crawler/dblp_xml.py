@@ -0,0 +1,106 @@
+import os
+import re
+import gzip
+from lxml import etree
+
+
+# tags of the records of the DBLP dump (children of the root element)
+DUMP_RECORD_TAGS = ('article', 'inproceedings', 'proceedings', 'book', 'incollection',
+                    'phdthesis', 'mastersthesis', 'www', 'data')
+
+# DBLP adds a 4 digit number to the names of homonymous authors (e.g. "John Smith 0001")
+AUTHOR_NUMBER_PATTERN = re.compile(r'\s\d{4}$')
+
+
+def element_text(element):
+    """Returns all the text of an element, including the text of its children (e.g. <i> or <sub> in the titles)."""
+    if element is None:
+        return None
+    return ''.join(element.itertext())
+
+
+def element_to_record(element):
+    """Converts an inproceedings element of the DBLP XML into a dictionary.
+
+    Args:
+        element (lxml element): inproceedings element.
+
+    Returns:
+        dict: the title, year, authors, DOI, key, booktitle, crossref and url of the publication.
+    """
+    doi = None
+    for ee in element.iterfind('ee'):
+        link = ee.text or ''
+        if 'doi.org/' in link:
+            doi = link.split('doi.org/', 1)[1]
+            break
+
+    return {'Title': element_text(element.find('title')),
+            'Year': element.findtext('year'),
+            'Authors': [AUTHOR_NUMBER_PATTERN.sub('', element_text(author)) for author in element.iterfind('author')],
+            'DOI': doi,
+            'Key': element.get('key'),
+            'Booktitle': element.findtext('booktitle'),
+            'Crossref': element.findtext('crossref'),
+            'Url': element.findtext('url')}
+
+
+def parse_toc(source):
+    """Parses incrementally the XML export of a DBLP table of contents (db/conf/{conf}/{conf}{year}.xml).
+
+    Args:
+        source (file object): the XML file.
+
+    Returns:
+        list: list of tuples with the h2 header, the h3 header (the last ones found before the publication) and the publication record.
+    """
+    publications = []
+    header_h2, header_h3 = None, None
+    for _, element in etree.iterparse(source, events=('end',), tag=('h2', 'h3', 'inproceedings')):
+        if element.tag == 'h2':
+            header_h2 = element_text(element)
+        elif element.tag == 'h3':
+            header_h3 = element_text(element)
+        else:
+            publications.append((header_h2, header_h3, element_to_record(element)))
+        element.clear()
+    return publications
+
+
+class DtdResolver(etree.Resolver):
+    """Resolves the dblp.dtd of the dump (it defines the entities used in the names) to a local file."""
+    def __init__(self, dtd_path):
+        super().__init__()
+        self.dtd_path = dtd_path
+
+    def resolve(self, url, pubid, context):
+        if url.endswith('dblp.dtd'):
+            return self.resolve_filename(self.dtd_path, context)
+        return None
+
+
+def iter_dump(dump_path, dtd_path=None):
+    """Reads the DBLP dump (dblp.xml or dblp.xml.gz) in one pass and with constant memory: the records are cleared once they are read.
+
+    Args:
+        dump_path (string): path of the dump.
+        dtd_path (string, optional): path of dblp.dtd. By default, the dblp.dtd in the same directory as the dump.
+
+    Yields:
+        dict: the record of each inproceedings publication (see element_to_record).
+    """
+    if dtd_path is None:
+        dtd_path = os.path.join(os.path.dirname(os.path.abspath(dump_path)), 'dblp.dtd')
+    opener = gzip.open if dump_path.endswith('.gz') else open
+
+    with opener(dump_path, 'rb') as f:
+        context = etree.iterparse(f, events=('end',), tag=DUMP_RECORD_TAGS, load_dtd=True, resolve_entities=True, huge_tree=True)
+        context.resolvers.add(DtdResolver(dtd_path))
+        for _, element in context:
+            if element.tag == 'inproceedings':
+                yield element_to_record(element)
+            # free the memory of the records already read
+            element.clear()
+            parent = element.getparent()
+            while parent is not None and element.getprevious() is not None:
+                del parent[0]
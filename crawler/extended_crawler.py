@@ -1,150 +1,266 @@
 from auxiliar import file
 from auxiliar import thread
+from auxiliar import http_client
+from auxiliar import matching
+from auxiliar import records
 from crawler.base_crawler import BaseCrawler
+from auxiliar.institutions import get_institution_table
+from auxiliar.paper_index import get_paper_index
+from auxiliar.entity_resolution import TitleMatcher
 import time
 import logging
-import requests
 import sys
 import threading
-from fuzzywuzzy import fuzz
-import unicodedata
+
+data_per_year = {}
+
+# default directory of the basic data of the conferences
+BASE_DATA_DIR = './data/base_crawler_data'
+S2_BATCH_URL = 'https://api.semanticscholar.org/graph/v1/paper/batch'
+# maximum number of IDs that the Semantic Scholar batch endpoint accepts in one request
+S2_BATCH_SIZE = 500
+
 
 class ExtendedCrawler(BaseCrawler):
-    def __init__(self, conferences, years, num_threads, output_dir):
-        super().__init__(conferences, years, num_threads, output_dir)
-        self.api_key = file.api_key_in_env()
+    def __init__(self, conferences, years, num_threads, output_dir, incremental=False, output_format='json', compression=None, nested=False, snapshot=None,
+                 base_dir=BASE_DATA_DIR):
+        super().__init__(conferences, years, num_threads, output_dir, incremental=incremental, 
+                         output_format=output_format, compression=compression, nested=nested)
+        # directory of the basic data (the input of the crawler)
+        self.base_dir = base_dir
+        # local snapshot of Semantic Scholar or OpenAlex used to resolve the titles before searching them with the API
+        self.matcher = TitleMatcher(snapshot, years=years) if snapshot is not None else None
         self.semaphore = threading.Semaphore(1)
 
     def crawl(self):
         initial_time = time.time()
         first_year, last_year = self.years
+        global data_per_year
+        data_per_year = {}
+
+        # every year of every conference is a unit of work, all the conferences are crawled at the same time
+        units = []
         for conf in self.conferences:
             print(f"(EXTENDED) - Crawling {conf} extended data from {first_year} to {last_year}...")
-            global data_per_year
-            data_per_year = {}
+            data_per_year[conf], completed = self._resume(conf, 'extended_data')
 
-            data_dir = f"./data/base_crawler_data/{conf}_basic_data"
-            if file.exists_file(data_dir):
-                basic_data = file.load_json(data_dir)
+            data_dir = f"{self.base_dir}/{conf}_basic_data"
+            if file.exists_data(data_dir):
+                basic_data = file.load_data(data_dir, years=range(first_year, last_year + 1))
             else:
                 sys.exit(f"Error: The basic data for the conference {conf} does not exist. Please run the base crawler first.")
-            
-            """
+
             for year in range(first_year, last_year + 1):
-                if not file.year_exists_in_file(year, data_per_year):
-                    logging.info(f"(EXTENDED) - {year} data not found.")
-            """
-                
-            threads = thread.Thread(self.num_threads)
-            threads.run(self._get_paper_data, (basic_data, first_year, last_year))
-            
-            file.save_json(f"{self.output_dir}/{conf}_extended_data", data_per_year)
+                if str(year) in basic_data and not file.year_exists_in_file(year, completed):
+                    units.append((conf, str(year), basic_data[str(year)]))
+
+        # the papers of each year are split in units of one paper, so the threads are used even with a single year.
+        # The Semantic Scholar title search and the OpenAlex requests are separate stages, the candidates of the title
+        # search of a year are verified together, and the last stage puts the papers of each year together again in their
+        # original order
+        self.pending_years = {}
+        self.pending_candidates = {}
+        pipeline = thread.Pipeline([(self._get_year_s2_data, self.num_threads),
+                                    (self._get_paper_s2_data, self.num_threads),
+                                    (self._verify_year_candidates, 1),
+                                    (self._get_paper_openalex_data, self.num_threads),
+                                    (self._collect_paper_data, 1)])
+        pipeline.run(units)
+        for conf, year in list(self.pending_candidates) + list(self.pending_years):
+            logging.error(f"(EXTENDED) - The year {year} of {conf} is not complete, it will be crawled again in the next execution")
+
+        for conf in self.conferences:
+            self._finish(conf, 'extended_data', data_per_year[conf])
 
+        get_institution_table().save()
+        records.clear()
         final_time = time.time()
         minutes = (final_time - initial_time) / 60
         print(f"(EXTENDED) - Done in {minutes:.3f} minutes")
 
 
-    def _get_paper_data(self, data, start_year, end_year):
-        """Function that gets the paper data for a range of years. It uses the _get_paper_s2_data_request and _get_openalex_data functions to get the data.
+    def _get_year_s2_data(self, conf, year, papers):
+        """First stage: gets the Semantic Scholar data of the papers of a year that can be requested together to the batch endpoint,
+        the papers with DOI and the ones found in the local snapshot (if any).
 
         Args:
-            data (dict): the data obtained with the initial search in the dblp API.
-            start_year (int): first year to search
-            end_year (int): last year to search
-        """    
+            conf (string): the name of the conference.
+            year (string): the year of the papers.
+            papers (list): the papers obtained with the initial search in the dblp API.
+
+        Returns:
+            list: the items of the papers for the next stage (conf, year, position, number of papers, paper, S2 data or None)
+        """
+        if not papers:
+            self._commit(conf, 'extended_data', data_per_year[conf], year, {year: []})
+            return []
+
+        # all the papers of the year with DOI are requested together to the batch endpoint
+        dois = [elem['DOI Number'] for elem in papers if elem['DOI Number']]
+        doi_data = self._get_papers_data_by_doi(dois)
+        s2_papers = [doi_data.get(elem['DOI Number']) if elem['DOI Number'] else None for elem in papers]
+
+        # the titles found in the snapshot are also requested together to the batch endpoint
+        missing = [i for i, s2_data in enumerate(s2_papers) if s2_data is None]
+        if self.matcher is not None and missing:
+            paper_ids = self.matcher.resolve_many([(papers[i]['Title'], papers[i]['Year'], self._author_names(papers[i]))
+                                                   for i in missing])
+            id_data = self._get_papers_data_by_ids([paper_id for paper_id in paper_ids if paper_id is not None])
+            for i, paper_id in zip(missing, paper_ids):
+                if paper_id is not None:
+                    s2_papers[i] = id_data.get(paper_id)
+
+        return [(conf, year, i, len(papers), elem, s2_data) for i, (elem, s2_data) in enumerate(zip(papers, s2_papers))]
+
+
+    def _get_paper_s2_data(self, conf, year, position, num_papers, elem, s2_data):
+        """Second stage: if the paper was not found with the batch endpoint, it is searched by title. The result of the search
+        is a candidate that is verified in the next stage. If the search fails, the paper is sent without candidate, so the
+        rest of the year is not lost.
+        """
+        candidate = None
+        if s2_data is None:
+            try:
+                candidate = self._get_paper_data_by_title(elem['Title'])
+            except Exception:
+                logging.exception(f"(EXTENDED) - Error searching the paper [{elem['Title']}] in Semantic Scholar")
+        return [(conf, year, position, num_papers, elem, s2_data, candidate)]
+
+
+    def _verify_year_candidates(self, conf, year, position, num_papers, elem, s2_data, candidate):
+        """Third stage (one thread): waits for the title search of all the papers of a year and verifies all their
+        candidates together (see matching.verify_papers).
+
+        Returns:
+            list: the items of all the papers of the year when the year is complete (with the verified S2 data or None).
+        """
+        items, ready = self.pending_candidates.setdefault((conf, year), ([None] * num_papers, [0]))
+        items[position] = (elem, s2_data, candidate)
+        ready[0] += 1
+        if ready[0] < num_papers:
+            return []
+        del self.pending_candidates[(conf, year)]
+
+        searched = [i for i, (_, _, candidate) in enumerate(items) if candidate is not None]
+        verified = matching.verify_papers(
+            [(items[i][0]['Title'], self._author_names(items[i][0])) for i in searched],
+            [(items[i][2]['Title'], [author['name'] for author in items[i][2]['Authors'] or []]) for i in searched])
+        accepted = {i for i, ok in zip(searched, verified) if ok}
+        return [(conf, year, i, num_papers, elem, candidate if i in accepted else s2_data)
+                for i, (elem, s2_data, candidate) in enumerate(items)]
+
+
+    def _get_paper_openalex_data(self, conf, year, position, num_papers, elem, s2_data):
+        """Fourth stage: if the paper has no OpenAlex data, it is requested with the DOI found in Semantic Scholar. Then the
+        extended data of the paper is built. If the OpenAlex request fails, the paper is built without the OpenAlex data,
+        so the rest of the year is not lost.
+        """
+        paper_doi_num = elem['DOI Number']
+        paper_openalex_link = elem['OpenAlex Link']
+        authors_institutions = elem['Authors and Institutions']
+        referenced_works = elem['OpenAlex Referenced Works']
+
+        if (s2_data is not None and paper_openalex_link is None) and s2_data['DOI'] is not None:
+            doi_s2 = s2_data['DOI']
+            try:
+                openalex_data = self._get_openalex_data(f"https://api.openalex.org/works/https://doi.org/{doi_s2}")
+            except Exception:
+                logging.exception(f"(EXTENDED) - Error requesting the DOI {doi_s2} to OpenAlex")
+                openalex_data = None
+            paper_doi_num, authors_institutions, referenced_works = openalex_data if openalex_data is not None else (None, None, None)
+            if paper_doi_num is None:
+                paper_doi_num = doi_s2
+
+        paper_data = {
+            'Title': elem['Title'],
+            'Year': elem['Year'],
+            'DOI Number': paper_doi_num,
+            'OpenAlex Link': paper_openalex_link,
+            'S2 Paper ID': s2_data['Paper ID'] if s2_data is not None else None,
+            'Authors and Institutions': authors_institutions,
+            'OpenAlex Referenced Works': referenced_works,
+            'Citations S2': s2_data['Citations'] if s2_data is not None else None,
+            'Abstract': s2_data['Abstract'] if s2_data is not None else None,
+            'TLDR': s2_data['TLDR'] if s2_data is not None else None,
+            #'Embedding': s2_data['Embedding'] if s2_data is not None else None,
+        }
+        return [(conf, year, position, num_papers, paper_data)]
+
+
+    def _collect_paper_data(self, conf, year, position, num_papers, paper_data):
+        """Last stage (one thread): puts the papers of each year together in their original order and saves the year
+        when all its papers are ready.
+
+        Returns:
+            list: the year and its papers when the year is complete (used by the pipeline mode to send them to the citations crawler).
+        """
+        papers, ready = self.pending_years.setdefault((conf, year), ([None] * num_papers, [0]))
+        papers[position] = paper_data
+        ready[0] += 1
+        if ready[0] < num_papers:
+            return []
+        del self.pending_years[(conf, year)]
+
+        self._commit(conf, 'extended_data', data_per_year[conf], year, {year: papers})
+        # the papers are added to the index of all the conferences (used to resolve the citations between conferences)
+        get_paper_index().add_papers(conf, papers)
+        return [(conf, year, papers)]
+
+
+    def _author_names(self, paper):
+        return [author['Author'] for author in paper['Authors and Institutions'] or []]
 
-        for year in range(start_year, end_year + 1):
-            paper_data = []
-            openalex_data = None
-            if str(year) not in data:
-                continue
-            for elem in data[str(year)]:
-                paper_title = elem['Title']
-                paper_doi_num = elem['DOI Number']
-                paper_pub_year = elem['Year']
-                paper_openalex_link = elem['OpenAlex Link']
-                authors_institutions = elem['Authors and Institutions']
-                referenced_works = elem['OpenAlex Referenced Works']
-
-                #print(f"(EXTENDED) - Getting data for {paper_title} ({year})")
-                
-                s2_data = self._get_s2_paper_data(paper_title, paper_doi_num, authors_institutions, paper_title)
-
-                if (s2_data is not None and paper_openalex_link is None) and s2_data['DOI'] is not None:
-                    doi_s2 = s2_data['DOI']
-                    openalex_data = super()._get_openalex_data(f"https://api.openalex.org/works/https://doi.org/{doi_s2}")
-                    paper_doi_num, authors_institutions, referenced_works = openalex_data if openalex_data is not None else (None, None, None)
-                    if paper_doi_num is None:
-                        paper_doi_num = doi_s2
-
-                paper_data.append ({
-                    'Title': paper_title,
-                    'Year': paper_pub_year,
-                    'DOI Number': paper_doi_num,
-                    'OpenAlex Link': paper_openalex_link,
-                    'S2 Paper ID': s2_data['Paper ID'] if s2_data is not None else None,
-                    'Authors and Institutions': authors_institutions,
-                    'OpenAlex Referenced Works': referenced_works,
-                    'Citations S2': s2_data['Citations'] if s2_data is not None else None,
-                    'Abstract': s2_data['Abstract'] if s2_data is not None else None,
-                    'TLDR': s2_data['TLDR'] if s2_data is not None else None,
-                    #'Embedding': s2_data['Embedding'] if s2_data is not None else None,
-                })
-
-            self.semaphore.acquire()
-            data_per_year[year] = paper_data
-            self.semaphore.release()
-
-
-    def _get_s2_paper_data(self, title, doi, authors_institutions, paper_title):
-        """This functions uses the Semantic Scholar API to get the paper data. If the DOI is not provided, it will search for the paper using the title.
+
+
+    def _get_papers_data_by_doi(self, dois):
+        """Function that gets the data of a list of papers using the Semantic Scholar batch endpoint (up to 500 DOIs per request).
 
         Args:
-            title (string): title of the paper to search
-            doi (string): DOI of the paper to search
+            dois (list): list with the DOIs of the papers.
 
         Returns:
-            dict: A dicctionary with the paper data (paper_id, abstract, tldr, embedding, citations)
-        """ 
-        response = None
-        paper_data_query_params = {'fields': 'title,authors.name,abstract,tldr,embedding,references,externalIds'}
-
-        # if the DOI is provided, search for the paper using the DOI
-        if doi:
-            response = self._get_paper_data_by_doi(doi, paper_data_query_params)
-            if response is not None:
-                return response
-        # if the DOI is not provided, search for the paper using the title
-        response_data = self._get_paper_data_by_title(title)
-        if self._verify_paper(response_data, authors_institutions, paper_title):
-            return response_data
-        return None
+            dict: dictionary with the DOI as key and the paper data as value (None if the paper was not found).
+        """
+        id_data = self._get_papers_data_by_ids([f"DOI:{doi}" for doi in dois])
+        return {doi: id_data.get(f"DOI:{doi}") for doi in dois}
 
 
 
+    def _get_papers_data_by_ids(self, paper_ids):
+        """Function that gets the data of a list of papers using the Semantic Scholar batch endpoint (up to 500 IDs per request).
 
-    def _get_paper_data_by_doi(self, doi, params):
-        url = f'https://api.semanticscholar.org/graph/v1/paper/{doi}'
-        response = self._make_request_with_retries(url, params)
+        Args:
+            paper_ids (list): list with the IDs of the papers (paperId, DOI:doi, CorpusId:id...).
+
+        Returns:
+            dict: dictionary with the ID as key and the paper data as value (None if the paper was not found).
+        """
+        params = {'fields': 'title,authors.name,abstract,tldr,references,externalIds'}
+        paper_ids = list(dict.fromkeys(paper_ids))
+        id_data = {}
+        for ini in range(0, len(paper_ids), S2_BATCH_SIZE):
+            batch = paper_ids[ini:ini + S2_BATCH_SIZE]
+            response = self._make_s2_request(S2_BATCH_URL, params, body={'ids': batch})
+
+            if response is None:
+                logging.error(f"(EXTENDED) - Error in batch request for {len(batch)} papers to Semantic Scholar")
+                continue
+
+            # the batch endpoint returns the papers in the same order as the IDs (null if not found)
+            for paper_id, paper in zip(batch, response.json()):
+                if paper is None:
+                    logging.error(f"(EXTENDED) - Paper {paper_id} not found in Semantic Scholar")
+                    id_data[paper_id] = None
+                else:
+                    id_data[paper_id] = self._extract_s2_data(paper)
+        return id_data
 
-        if response is None:
-            logging.error(f"(EXTENDED) - Paper with DOI {doi} not found in Semantic Scholar")
-            return None
-            
-        if response.status_code == 200:
-            json_response = response.json()
-            return self._extract_s2_data(json_response)
-        else:
-            logging.error(f"(EXTENDED) - {response.status_code} in request for paper with DOI {doi}")
-            return None
-        
 
 
     def _get_paper_data_by_title(self, title):
         url = f"https://api.semanticscholar.org/graph/v1/paper/search/match?"
         query_params = {'query': f'{title}.', 'fields': 'title,externalIds,abstract,tldr,references,year,authors.name'}
-        search_response = self._make_request_with_retries(url, query_params)
+        search_response = self._make_s2_request(url, query_params)
 
         if search_response is None:
             logging.error(f"(EXTENDED) - Paper [{title}] not found in Semantic Scholar")
@@ -198,75 +314,20 @@ class ExtendedCrawler(BaseCrawler):
     
 
 
-    def _make_request_with_retries(self, url, params, retries=2, initial_sleep=2, backoff_factor=5):
-        """Function that makes a request to an API and returns the response data. Used in the _get_paper_s2_data_request function.
+    def _make_s2_request(self, url, params, body=None):
+        """Function that makes a request to the Semantic Scholar API. The API key, the rate limit and the retries are handled by http_client.
 
         Args:
             url (string): the URL of the API.
             params (dict): the parameters for the request.
-            retries (int, optional): number of retries. Defaults to 2.
-            initial_sleep (int, optional): initial sleep time. Defaults to 1.
-            backoff_factor (int, optional): backoff factor. Defaults to 5.
+            body (dict, optional): JSON body of the request. If it is provided, a POST request is made.
 
         Returns:
-            response object: the response data.
+            response object: the response, or None if it is not successful.
         """
-
-        for attempt in range(retries+1):
-            # if an API key is provided, use it in the request
-            if self.api_key is not None:
-                response = requests.get(url, params=params, headers={'x-api-key': self.api_key})    
-            else:
-                response = requests.get(url, params=params)
-
-            # if the response is successful, return it
-            if response.status_code == 200:
-                return response
-            # if the response is 429 or 504, sleep and try
-            elif response.status_code == 429 or response.status_code == 504:
-                time.sleep(initial_sleep + attempt * backoff_factor)
-            else: # if the response is not successful, return None
-                break
+        if body is not None:
+            response = http_client.post(url, params=params, json=body)
+        else:
+            response = http_client.get(url, params=params)
         return response if response.status_code == 200 else None
-    
-
-
-    def _verify_paper(self, paper_data, dblp_authors, paper_title):
-        if paper_data is not None:
-            #s2_year = paper_data['Year']
-            s2_num_authors = len(paper_data['Authors'])
-            dblp_num_authors = len(dblp_authors)
-            s2_authors_names = [author['name'] for author in paper_data['Authors']]
-            dblp_authors_names = [author['Author'] for author in dblp_authors]
-            s2_paper_title = paper_data['Title']
-
-            if paper_title[-1] == '.' and s2_paper_title[-1] != '.':
-                s2_paper_title = f"{paper_data['Title']}."
-            elif paper_title[-1] != '.' and s2_paper_title[-1] == '.': 
-                s2_paper_title = paper_data['Title'][:-1]
-
-            if paper_title.lower() == s2_paper_title.lower():
-                return True
-            if s2_num_authors == dblp_num_authors and self._compare_authors(dblp_authors_names, s2_authors_names):
-                return True
-        return False
-    
-
-
-    def _normalize_string(self, name):
-        name = ''.join(
-        c for c in unicodedata.normalize('NFD', name)
-        if unicodedata.category(c) != 'Mn'
-        )
-        return name.lower().strip()
-    
-
 
-    def _compare_authors(self, dblp_authors, s2_authors):
-        similar_authors = 0
-        for i in range(len(dblp_authors)):
-            similarity = fuzz.ratio(self._normalize_string(dblp_authors[i]), self._normalize_string(s2_authors[i]))
-            if similarity >= 75:
-                similar_authors += 1
-        return similar_authors >= (len(dblp_authors) / 2)
-        
\ No newline at end of file
@@ -0,0 +1,120 @@
+import time
+import logging
+from auxiliar import file, thread, http_client, records
+from auxiliar.institutions import get_institution_table
+from crawler import base_crawler, extended_crawler, citations_crawler
+
+
+class PipelineCrawler:
+    """Runs the base, extended and citations crawlers in one execution. The papers of each year go to the next crawler as
+    soon as they are ready, through bounded queues, instead of waiting for the whole output file of the previous crawler.
+
+    The data of each crawler is saved in its own directory inside output_dir (base_crawler_data, extended_crawler_data and
+    citations_crawler_data) and the data of every crawler is saved in its checkpoint file after every year, so an
+    interrupted execution can be resumed with the incremental option (also crawler by crawler).
+    """
+    def __init__(self, conferences, years, num_threads, output_dir, filter=None, parser='xml', incremental=False, snapshot=None,
+                 output_format='json', compression=None, nested=False):
+        self.conferences = conferences
+        self.years = years
+        self.num_threads = num_threads
+        self.output_format = output_format
+        output_options = {'output_format': output_format, 'compression': compression, 'nested': nested}
+        self.base = base_crawler.BaseCrawler(conferences, years, num_threads, f"{output_dir}/base_crawler_data", filter=filter,
+                                             parser=parser, incremental=incremental, **output_options)
+        self.extended = extended_crawler.ExtendedCrawler(conferences, years, num_threads, f"{output_dir}/extended_crawler_data",
+                                                         incremental=incremental, snapshot=snapshot, base_dir=self.base.output_dir,
+                                                         **output_options)
+        self.citations = citations_crawler.CitationsCrawler(conferences, years, num_threads, f"{output_dir}/citations_crawler_data",
+                                                            incremental=incremental, extended_dir=self.extended.output_dir,
+                                                            **output_options)
+        self.completed = {}
+
+    def crawl(self):
+        initial_time = time.time()
+        first_year, last_year = self.years
+        base_crawler.data_per_year.clear()
+        extended_crawler.data_per_year.clear()
+        citations_crawler.all_citation_data.clear()
+        self.citations._index_papers(self.conferences, self.extended.output_dir)
+
+        # every year of every conference is a unit of work. The years with extended data from a previous execution
+        # only go through the citations stages
+        units, extended_units = [], []
+        for conf in self.conferences:
+            print(f"(PIPELINE) - Crawling {conf} from {first_year} to {last_year}...")
+            base_crawler.data_per_year[conf], self.completed[(conf, 'basic_data')] = self.base._resume(conf, 'basic_data')
+            extended_crawler.data_per_year[conf], self.completed[(conf, 'extended_data')] = self.extended._resume(conf, 'extended_data')
+            self.citations._open_output(conf)
+
+            links_per_year = {}
+            for link in self.base._get_year_links(conf, first_year, last_year):
+                links_per_year.setdefault(self.base._get_link_year(conf, link), []).append(link)
+            for year, links in sorted(links_per_year.items()):
+                if file.year_exists_in_file(year, self.completed[(conf, 'extended_data')]):
+                    extended_units.append((conf, year, self._load_completed(self.extended, conf, 'extended_data', year)))
+                else:
+                    units.append((conf, year, links))
+
+        citations_stages = [(self.citations._get_year_citations_s2, self.num_threads),
+                            (self.citations._get_citation_data, self.num_threads),
+                            (self.citations._collect_citation_data, 1)]
+        self.extended.pending_years = {}
+        self.extended.pending_candidates = {}
+        self.citations.pending_years = {}
+        stages = [(self._get_year_basic_data, self.num_threads),
+                  (self.extended._get_year_s2_data, self.num_threads),
+                  (self.extended._get_paper_s2_data, self.num_threads),
+                  (self.extended._verify_year_candidates, 1),
+                  (self.extended._get_paper_openalex_data, self.num_threads),
+                  (self.extended._collect_paper_data, 1)] + citations_stages
+        # the threads of all the stages send requests at the same time through the shared pool of connections
+        http_client.configure_pool(sum(num_threads for _, num_threads in stages))
+        pipeline = thread.Pipeline(stages)
+        pipeline.run(units)
+        if extended_units:
+            thread.Pipeline(citations_stages).run(extended_units)
+        for conf, year in list(self.extended.pending_candidates) + list(self.extended.pending_years):
+            logging.error(f"(PIPELINE) - The year {year} of {conf} is not complete, it will be crawled again in the next execution")
+        for conf, year in self.citations.pending_years:
+            logging.error(f"(PIPELINE) - The citations of the year {year} of {conf} are not complete, they will be crawled again in the next execution")
+
+        for conf in self.conferences:
+            self.base._finish(conf, 'basic_data', base_crawler.data_per_year[conf])
+            self.extended._finish(conf, 'extended_data', extended_crawler.data_per_year[conf])
+            self.citations._save_output(conf)
+
+        get_institution_table().save()
+        records.clear()
+        final_time = time.time()
+        minutes = (final_time - initial_time) / 60
+        print(f"(PIPELINE) - Done in {minutes:.3f} minutes")
+
+    def _get_year_basic_data(self, conf, year, links):
+        """First stage: gets the basic data of a year of a conference (or loads it, if it was obtained in a previous execution).
+
+        Args:
+            conf (string): the name of the conference.
+            year (string): the year.
+            links (list): the links of the year pages of the year.
+
+        Returns:
+            list: the year and its papers for the extended crawler.
+        """
+        if file.year_exists_in_file(year, self.completed[(conf, 'basic_data')]):
+            return [(conf, year, self._load_completed(self.base, conf, 'basic_data', year))]
+
+        papers = []
+        for link in links:
+            for year_papers in self.base._search(conf, link).values():
+                papers.extend(year_papers)
+        return [(conf, year, papers)]
+
+    def _load_completed(self, crawler, conf, name, year):
+        """Returns the papers of a year obtained by a crawler in a previous execution."""
+        if self.output_format == 'jsonl':
+            # the writer of the crawler is open, but the papers of the completed years are already on disk
+            data = file.load_data(f"{crawler.output_dir}/{conf}_{name}", years=[year]) or {}
+        else:
+            data = (base_crawler.data_per_year if name == 'basic_data' else extended_crawler.data_per_year)[conf]
+        return data.get(str(year), [])